@@ -0,0 +1,89 @@
+import atexit
+import csv
+import os
+import queue
+import threading
+
+from card import CARDS
+from hand_history import HandHistoryWriter
+
+LOG_OFF, LOG_HAND, LOG_ACTION = 0, 1, 2
+LOG_LEVELS = {"off": LOG_OFF, "hand": LOG_HAND, "action": LOG_ACTION}
+
+HEADER = ["Episode", "Phase", "Player", "Action", "Amount", "Pot", "Stack", "Community", "Hole"]
+
+
+def _cards_str(indices):
+    return ";".join(str(CARDS[i]) for i in indices)
+
+
+class CsvWriter:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(HEADER)
+
+    def append(self, records):
+        self._writer.writerows([episode, phase, player, action, amount, pot, stack,
+                                _cards_str(board), _cards_str(hole)]
+                               for episode, phase, player, action, amount, pot, stack, board, hole in records)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ActionLogger:
+    # Callers queue compact tuples (episode, phase, player, action, amount, pot,
+    # stack, board indices, hole indices); a background thread writes them in
+    # batches. level: "off", "hand" (showdown and result rows only) or "action"
+    # (every betting action as well). fmt: "csv" writes one CSV file at `path`,
+    # "columnar" a hand-history shard under the `path` directory.
+    def __init__(self, path, level="hand", fmt="csv", batch_size=1024, max_queue=65536):
+        self.path = path
+        self.level = LOG_LEVELS[level] if isinstance(level, str) else level
+        self.batch_size = batch_size
+        self.closed = False
+        self._thread = None
+        if self.level == LOG_OFF:
+            return
+        self._sink = HandHistoryWriter(path) if fmt == "columnar" else CsvWriter(path)
+        self._queue = queue.Queue(max_queue)
+        self._thread = threading.Thread(target=self._run, name=f"ActionLogger({path})", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, record):
+        if self.level:
+            self._queue.put(record)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            finished = batch[-1] is None
+            if finished:
+                batch.pop()
+            try:
+                if batch:
+                    self._sink.append(batch)
+            except Exception as e:
+                print("Logging error:", e)
+            if finished:
+                return
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.level = LOG_OFF
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._sink.close()
+            atexit.unregister(self.close)
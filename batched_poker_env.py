@@ -0,0 +1,262 @@
+import numpy as np
+from gym import spaces
+
+from deck import Deck
+from equity import batch_equity
+from equity_tables import load_equity_tables
+from evaluator import NO_FLUSH, MAX_HIGH_CARD, evaluate_batch
+from observation import COMPACT_BOARD, COMPACT_POT, COMPACT_SIZE, NO_CARD, OBS_SIZE, encode_compact_scalars
+from player import RAISE_AMOUNT
+from rl_poker_env import POLICIES
+
+FOLD, CHECK, CALL, RAISE = 0, 1, 2, 3
+ACTION_CODES = {"fold": FOLD, "check": CHECK, "call": CALL, "raise": RAISE, "reraise": RAISE}
+
+# POLICIES as columns: wanted action, raise amount, call limit, action vs a raise, reraise amount.
+POLICY_WANTED = np.array([ACTION_CODES[p["wanted_action"]] for p in POLICIES])
+POLICY_RAISE = np.array([p["raise_amount"] for p in POLICIES])
+POLICY_CALL_TILL = np.array([p["call_till"] for p in POLICIES])
+POLICY_VS_RAISE = np.array([ACTION_CODES[p["action_vs_raise"]] for p in POLICIES])
+POLICY_RERAISE = np.array([p["reraise_amount"] for p in POLICIES])
+
+
+class BatchedPokerEnv:
+    # N independent RLPokerEnv tables stepped in lockstep. Seat 0 is the agent,
+    # seats 1.. are StatisticalBot-style opponents. Per-table state lives in
+    # (N, players) arrays and each betting action is applied to every table at once.
+    #
+    # Betting follows BettingRound: call matches the current bet, raise puts in
+    # the call plus the raise amount.
+    def __init__(self, num_envs=256, initial_stack=1000, num_opponents=1, starting_bet=10,
+                 raise_threshold=0.7, call_threshold=0.4, equity_samples=100, equity_strength=False, rng=None,
+                 compact_obs=False):
+        self.num_envs = num_envs
+        self.num_players = num_opponents + 1
+        self.num_opponents = num_opponents
+        self.initial_stack = initial_stack
+        self.starting_bet = starting_bet
+        self.raise_threshold = raise_threshold
+        self.call_threshold = call_threshold
+        self.equity_samples = equity_samples
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.equity_tables = load_equity_tables()
+        self.equity_strength = equity_strength
+
+        self.compact_obs = compact_obs
+        high, dtype, size = (255, np.uint8, COMPACT_SIZE) if compact_obs else (1, np.float32, OBS_SIZE)
+        self.single_observation_space = spaces.Box(low=0, high=high, shape=(size,), dtype=dtype)
+        self.observation_space = spaces.Box(low=0, high=high, shape=(num_envs, size), dtype=dtype)
+        self.action_space = spaces.MultiDiscrete([len(POLICIES)] * num_envs)
+
+        shape = (num_envs, self.num_players)
+        self.stacks = np.full(shape, initial_stack, dtype=np.int64)
+        self.bets = np.zeros(shape, dtype=np.int64)
+        self.folded = np.zeros(shape, dtype=bool)
+        self.contributed = np.zeros(shape, dtype=np.int64)
+        self.holes = np.zeros(shape + (2,), dtype=np.int64)
+        self.boards = np.zeros((num_envs, 5), dtype=np.int64)
+        self.board_len = np.zeros(num_envs, dtype=np.int64)
+        self.pots = np.zeros(num_envs, dtype=np.int64)
+        self.current_bets = np.zeros(num_envs, dtype=np.int64)
+        self.reset()
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        broke = (self.stacks <= self.initial_stack * 0.1) | (self.stacks > 3 * self.initial_stack)
+        self.stacks[broke] = self.initial_stack
+
+        ante = np.where(self.stacks >= self.starting_bet, self.starting_bet, 0)
+        self.stacks -= ante
+        self.bets[:] = ante
+        self.contributed[:] = ante
+        self.pots[:] = ante.sum(axis=1)
+        self.current_bets[:] = 0
+        self.folded[:] = False
+
+        # Same dealing order as RLPokerEnv: two cards per seat, then the board.
+        orders = Deck.shuffled_orders(self.rng, self.num_envs).astype(np.int64)
+        self.holes[:] = orders[:, :2 * self.num_players].reshape(self.num_envs, self.num_players, 2)
+        self.boards[:] = orders[:, 2 * self.num_players:2 * self.num_players + 5]
+        self.board_len[:] = 3
+        return self._get_obs()
+
+    def step(self, actions):
+        # actions: (N,) policy indices used on every street, or (N, 3) for flop, turn and river.
+        actions = np.asarray(actions, dtype=np.int64)
+        if actions.ndim == 1:
+            actions = np.repeat(actions[:, None], 3, axis=1)
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        agent_folded = np.zeros(self.num_envs, dtype=bool)
+
+        for street, board_len in enumerate((3, 4, 5)):
+            live = ~agent_folded
+            self.board_len[live] = board_len
+            self.current_bets[:] = 0
+            self.bets[:] = 0
+            self._betting_round(actions[:, street], live, board_len)
+            newly_folded = live & self.folded[:, 0]
+            rewards[newly_folded] = -self.pots[newly_folded]
+            agent_folded |= newly_folded
+
+        winnings = self._award_pots()
+        # Same reward convention as RLPokerEnv: the chips won if any, minus the pot otherwise.
+        showdown = ~agent_folded
+        won = winnings[showdown, 0]
+        rewards[showdown] = np.where(won > 0, won, -self.pots[showdown])
+        return self._get_obs(), rewards, np.ones(self.num_envs, dtype=bool), {}
+
+    def _opponent_equity(self, tables, board_len):
+        # (len(tables), num_opponents) equity of each opponent against the
+        # other players still in the hand, on the visible board.
+        board = self.boards[tables, :board_len]
+        others = (~self.folded[tables]).sum(axis=1) - 1
+        equity = np.zeros((len(tables), self.num_opponents))
+        for seat in range(1, self.num_players):
+            holes = self.holes[tables, seat]
+            for k in np.unique(others).tolist():
+                rows = np.flatnonzero(others == k)
+                seat_equity = np.full(len(rows), np.nan)
+                if self.equity_tables is not None and board_len == 3 and k == 1:
+                    seat_equity = self.equity_tables.flop_batch(holes[rows], board[rows])
+                missing = np.isnan(seat_equity)
+                if missing.any():
+                    seat_equity[missing] = batch_equity(holes[rows[missing]], board[rows[missing]], k,
+                                                        self.equity_samples, self.rng)
+                equity[rows, seat - 1] = seat_equity
+        return equity
+
+    def _agent_decision(self, policy, call_amt, stack):
+        wanted = POLICY_WANTED[policy]
+        raise_amt = POLICY_RAISE[policy]
+        vs_raise = POLICY_VS_RAISE[policy]
+        reraise_amt = POLICY_RERAISE[policy]
+        kind = np.full(len(policy), FOLD)
+        amount = np.zeros(len(policy), dtype=np.int64)
+
+        free = call_amt == 0
+        can_raise = (wanted == RAISE) & (stack >= raise_amt)
+        kind[free] = CHECK
+        within = ~free & (call_amt <= POLICY_CALL_TILL[policy]) & (call_amt <= stack)
+        kind[within & (wanted == CALL)] = CALL
+        opens = (free | within) & can_raise
+        kind[opens] = RAISE
+        amount[opens] = raise_amt[opens]
+
+        facing = ~free & ~within
+        kind[facing & (vs_raise == CALL) & (call_amt <= stack)] = CALL
+        reraises = facing & (vs_raise == RAISE) & (stack >= reraise_amt)
+        kind[reraises] = RAISE
+        amount[reraises] = reraise_amt[reraises]
+        return kind, amount
+
+    def _bot_decision(self, equity, call_amt, stack):
+        kind = np.where(equity >= self.raise_threshold, RAISE,
+                        np.where(equity >= self.call_threshold, CALL, np.where(call_amt > 0, FOLD, CHECK)))
+        amount = np.where(kind == RAISE, np.minimum(stack, RAISE_AMOUNT), 0)
+        return kind, amount
+
+    def _betting_round(self, policy, live, board_len):
+        # BettingRound's rules applied to every table at once: seats act in
+        # turn and a table closes once everyone left has acted since the last raise.
+        tables = np.flatnonzero(live & ((~self.folded).sum(axis=1) >= 2))
+        equity = self._opponent_equity(tables, board_len)
+        to_act = (~self.folded[tables] & (self.stacks[tables] > 0)).sum(axis=1)
+        while len(tables):
+            for seat in range(self.num_players):
+                stack = self.stacks[tables, seat]
+                acting = ~self.folded[tables, seat] & (stack > 0)
+                call_amt = self.current_bets[tables] - self.bets[tables, seat]
+                if seat == 0:
+                    kind, amount = self._agent_decision(policy[tables], call_amt, stack)
+                else:
+                    kind, amount = self._bot_decision(equity[:, seat - 1], call_amt, stack)
+
+                folds = acting & (kind == FOLD)
+                self.folded[tables[folds], seat] = True
+                chips = np.where(kind == RAISE, np.minimum(call_amt + amount, stack), np.minimum(call_amt, stack))
+                chips = np.where(acting & ~folds, chips, 0)
+                self.stacks[tables, seat] -= chips
+                self.bets[tables, seat] += chips
+                self.contributed[tables, seat] += chips
+                self.pots[tables] += chips
+                raised = self.bets[tables, seat] > self.current_bets[tables]
+                self.current_bets[tables] = np.maximum(self.current_bets[tables], self.bets[tables, seat])
+
+                can_act = ~self.folded[tables] & (self.stacks[tables] > 0)
+                to_act = np.where(raised, can_act.sum(axis=1) - can_act[:, seat], to_act - acting)
+                still_betting = (to_act > 0) & can_act.any(axis=1) & ((~self.folded[tables]).sum(axis=1) >= 2)
+                tables = tables[still_betting]
+                equity = equity[still_betting]
+                to_act = to_act[still_betting]
+                if len(tables) == 0:
+                    break
+
+    def _award_pots(self):
+        # Vectorized betting.award_pots: one pass per distinct all-in level,
+        # each paying the chips between it and the previous level to the best
+        # eligible hands. Returns the (N, players) chips won.
+        scores = evaluate_batch(self.holes.reshape(-1, 2), np.repeat(self.boards, self.num_players, axis=0))
+        scores = scores.reshape(self.num_envs, self.num_players).astype(np.int64)
+        live = ~self.folded
+        contributed = self.contributed
+        levels = np.sort(np.where(live, contributed, 0), axis=1)
+        rows = np.arange(self.num_envs)
+        previous = np.zeros(self.num_envs, dtype=np.int64)
+        winnings = np.zeros_like(contributed)
+        for j in range(self.num_players):
+            level = levels[:, j]
+            amount = (np.minimum(contributed, level[:, None]) - np.minimum(contributed, previous[:, None])).sum(axis=1)
+            if j == self.num_players - 1:
+                # Chips folded players put in above every live player's total.
+                amount += (contributed - np.minimum(contributed, level[:, None])).sum(axis=1)
+            eligible = live & (contributed >= level[:, None])
+            ranked = np.where(eligible, scores, NO_FLUSH)
+            winners = eligible & (ranked == ranked.min(axis=1, keepdims=True))
+            n_winners = winners.sum(axis=1)
+            share = amount // np.maximum(n_winners, 1)
+            winnings += winners * share[:, None]
+            # Odd chips go to the earliest winning seat.
+            winnings[rows, winners.argmax(axis=1)] += np.where(n_winners > 0, amount - share * n_winners, 0)
+            previous = level
+        self.stacks += winnings
+        return winnings
+
+    def _get_obs(self, out=None):
+        if self.compact_obs:
+            return self._get_compact_obs(out)
+        obs = np.empty((self.num_envs, OBS_SIZE), dtype=np.float32) if out is None else out
+        # A reused buffer still has the previous hand's card bits set.
+        obs[:] = 0
+        rows = np.arange(self.num_envs)[:, None]
+        obs[rows, self.holes[:, 0]] = 1
+        visible = np.arange(5)[None, :] < self.board_len[:, None]
+        board_rows, board_cols = np.nonzero(visible)
+        obs[board_rows, 52 + self.boards[board_rows, board_cols]] = 1
+        obs[:, 104] = self.pots / 1000
+        obs[:, 105] = self.stacks[:, 0] / 1000
+        obs[:, 106] = self._hand_strength()
+        return obs
+
+    def _get_compact_obs(self, out=None):
+        obs = np.empty((self.num_envs, COMPACT_SIZE), dtype=np.uint8) if out is None else out
+        obs[:, :COMPACT_BOARD] = self.holes[:, 0]
+        visible = np.arange(5)[None, :] < self.board_len[:, None]
+        obs[:, COMPACT_BOARD:COMPACT_POT] = np.where(visible, self.boards, NO_CARD)
+        encode_compact_scalars(obs, self.pots, self.stacks[:, 0], self._hand_strength())
+        return obs
+
+    def _hand_strength(self):
+        strength = np.empty(self.num_envs)
+        for board_len in (3, 4, 5):
+            rows = np.flatnonzero(self.board_len == board_len)
+            if len(rows) == 0:
+                continue
+            holes = self.holes[rows, 0]
+            board = self.boards[rows, :board_len]
+            strength[rows] = 1 - evaluate_batch(holes, board) / MAX_HIGH_CARD
+            if self.equity_strength and self.equity_tables is not None and board_len == 3 \
+                    and self.num_opponents == 1:
+                equity = self.equity_tables.flop_batch(holes, board)
+                strength[rows] = np.where(np.isnan(equity), strength[rows], equity)
+        return strength
@@ -0,0 +1,30 @@
+import argparse
+import time
+
+import numpy as np
+
+from rl_poker_env import POLICIES, RLPokerEnv
+
+
+def run(seats, hands, seed=0):
+    env = RLPokerEnv(num_opponents=seats - 1, log_level="off")
+    rng = np.random.default_rng(seed)
+    env.reset()
+    start = time.perf_counter()
+    for _ in range(hands):
+        action_seq = [POLICIES[i] for i in rng.integers(len(POLICIES), size=3)]
+        _, _, done, _ = env.step(action_seq)
+        if done:
+            env.reset()
+    elapsed = time.perf_counter() - start
+    env.close()
+    return hands / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hands per second of RLPokerEnv by table size")
+    parser.add_argument("--seats", type=int, nargs="+", default=[2, 6, 9])
+    parser.add_argument("--hands", type=int, default=500)
+    args = parser.parse_args()
+    for seats in args.seats:
+        print(f"{seats} seats: {run(seats, args.hands):.1f} hands/sec")
@@ -0,0 +1,120 @@
+class BettingRound:
+    # One street of betting over `players` in seat order. Tracks the acting
+    # seat, the last aggressor and how many players still have to act, so each
+    # action is constant work and the round closes as soon as everyone left
+    # has acted since the last raise.
+    #
+    # Chips are moved here and nowhere else: call matches the current bet,
+    # raise puts in the call plus `amount`, and both are capped by the stack.
+    # A check facing a bet is treated as a call.
+    def __init__(self, players, pot=0, start=0):
+        self.players = players
+        self.pot = pot
+        self.current_bet = max((p.bet for p in players), default=0)
+        self.last_aggressor = None
+        self.live = sum(not p.folded for p in players)
+        self.active = sum(self._can_act(p) for p in players)
+        self.to_act = self.active
+        self.seat = self._next_seat(start - 1)
+
+    @staticmethod
+    def _can_act(player):
+        return not player.folded and player.stack > 0
+
+    def _next_seat(self, seat):
+        n = len(self.players)
+        for step in range(1, n + 1):
+            candidate = (seat + step) % n
+            if self._can_act(self.players[candidate]):
+                return candidate
+        return None
+
+    @property
+    def done(self):
+        return self.to_act <= 0 or self.live <= 1 or self.seat is None
+
+    @property
+    def player(self):
+        return self.players[self.seat]
+
+    def to_call(self, player=None):
+        player = self.player if player is None else player
+        return max(0, self.current_bet - player.bet)
+
+    def apply(self, action):
+        # Applies the acting player's action dict and moves to the next seat.
+        # Returns (action actually taken, chips put in).
+        player = self.player
+        kind = action["action"]
+        to_call = self.to_call(player)
+        chips = 0
+        if kind == "fold":
+            player.folded = True
+            self.live -= 1
+            self.active -= 1
+            self.to_act -= 1
+        else:
+            if kind == "raise":
+                chips = min(to_call + max(action.get("amount", 0), 0), player.stack)
+                if chips <= to_call:
+                    kind = "call"
+            elif kind in ("call", "check"):
+                chips = min(to_call, player.stack)
+                kind = "call" if chips > 0 else "check"
+            else:
+                raise ValueError(f"Unknown action: {action}")
+            player.stack -= chips
+            player.bet += chips
+            player.contributed += chips
+            self.pot += chips
+            if player.stack == 0:
+                self.active -= 1
+            if player.bet > self.current_bet:
+                self.current_bet = player.bet
+                self.last_aggressor = self.seat
+                # Everyone else who can still act gets another turn.
+                self.to_act = self.active - (player.stack > 0)
+            else:
+                self.to_act -= 1
+        self.seat = self._next_seat(self.seat)
+        return kind, chips
+
+
+def side_pots(contributions, folded):
+    # Splits each player's chips for the hand into a main pot and side pots.
+    # Returns [(amount, eligible seat indices)]; folded players' chips are in
+    # the pots but they are never eligible.
+    levels = sorted({c for c, f in zip(contributions, folded) if not f and c > 0})
+    pots = []
+    previous = 0
+    for level in levels:
+        amount = sum(min(c, level) - min(c, previous) for c in contributions)
+        eligible = [i for i, (c, f) in enumerate(zip(contributions, folded)) if not f and c >= level]
+        pots.append((amount, eligible))
+        previous = level
+    # Chips a folded player put in above every live player's total go to the last pot.
+    leftover = sum(c - min(c, previous) for c in contributions)
+    if leftover and pots:
+        amount, eligible = pots[-1]
+        pots[-1] = (amount + leftover, eligible)
+    elif leftover:
+        pots.append((leftover, [i for i, f in enumerate(folded) if not f]))
+    return pots
+
+
+def award_pots(players, scores):
+    # scores: evaluator score per player (lower wins), ignored for folded players.
+    # Pays every pot to its best eligible hands, ties split with odd chips to the
+    # earliest seat, and returns the chips won per player.
+    winnings = [0] * len(players)
+    pots = side_pots([p.contributed for p in players], [p.folded for p in players])
+    for amount, eligible in pots:
+        best = min(scores[i] for i in eligible)
+        winners = [i for i in eligible if scores[i] == best]
+        share, odd = divmod(amount, len(winners))
+        for i in winners:
+            winnings[i] += share
+        winnings[winners[0]] += odd
+    for player, won in zip(players, winnings):
+        player.stack += won
+    return winnings
@@ -9,15 +9,55 @@ class Card:
         'Clubs': '♣️'
     }
 
-    def __init__(self, rank, suit):
-        if rank not in self.ranks or suit not in self.suits:
-            raise ValueError(f"Invalid card: {rank} of {suit}")
-        self.rank = rank
-        self.suit = suit
+    # Cards are interned: Card('A', 'Spades') always returns the same object,
+    # so identity comparison and `in` checks stay cheap.
+    __slots__ = ('rank', 'suit', 'rank_idx', 'suit_idx', 'index', 'mask')
+    _interned = {}
+
+    def __new__(cls, rank, suit):
+        try:
+            return cls._interned[(rank, suit)]
+        except KeyError:
+            raise ValueError(f"Invalid card: {rank} of {suit}") from None
+
+    @classmethod
+    def _create(cls, rank, suit):
+        card = object.__new__(cls)
+        card.rank = rank
+        card.suit = suit
+        card.rank_idx = cls.ranks.index(rank)
+        card.suit_idx = cls.suits.index(suit)
+        card.index = card.suit_idx * 13 + card.rank_idx
+        card.mask = 1 << card.index
+        cls._interned[(rank, suit)] = card
+        return card
+
+    def __reduce__(self):
+        return Card, (self.rank, self.suit)
 
     def __repr__(self):
         return f"{self.rank}{self.suit_symbols[self.suit]}"
 
 
     def __str__(self):
-        return f"{self.rank} {self.suit}"
\ No newline at end of file
+        return f"{self.rank} {self.suit}"
+
+
+# All 52 cards ordered by index (suit-major, matching the one-hot layout).
+CARDS = tuple(Card._create(rank, suit) for suit in Card.suits for rank in Card.ranks)
+
+
+def as_cards(cards):
+    # Accepts a list of Card objects, an iterable of 0..51 indices or a 52-bit mask.
+    if isinstance(cards, int):
+        return mask_to_cards(cards)
+    return [c if isinstance(c, Card) else CARDS[c] for c in cards]
+
+
+def mask_to_cards(mask):
+    cards = []
+    while mask:
+        low = mask & -mask
+        cards.append(CARDS[low.bit_length() - 1])
+        mask ^= low
+    return cards
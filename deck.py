@@ -1,15 +1,52 @@
-import random
-from card import Card
+import numpy as np
+from card import CARDS
+
 
 class Deck:
-    def __init__(self):
+    def __init__(self, rng=None, batch_size=1024):
+        # Shuffles are drawn `batch_size` at a time; reset() only moves to the next row.
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.batch_size = batch_size
+        self._orders = None
+        self._next_order = 0
         self.reset()
 
-    def reset(self):
-        self.cards = [Card(rank, suit) for rank in Card.ranks for suit in Card.suits]
-        random.shuffle(self.cards)
+    def reseed(self, rng):
+        # Drops the shuffles already drawn so the next reset() comes from `rng`.
+        self.rng = rng
+        self._orders = None
+
+    def snapshot(self):
+        # The shuffle arrays are shared with the snapshot, not copied.
+        return self.order, self.cursor, self._orders, self._next_order, self.rng.bit_generator.state
+
+    def restore(self, state):
+        self.order, self.cursor, self._orders, self._next_order, rng_state = state
+        self.rng.bit_generator.state = rng_state
+
+    @staticmethod
+    def shuffled_orders(rng, n):
+        # (n, 52) uint8 array, each row an independent permutation of card indices.
+        return rng.permuted(np.tile(np.arange(52, dtype=np.uint8), (n, 1)), axis=1)
+
+    def reset(self, order=None):
+        if order is None:
+            if self._orders is None or self._next_order >= len(self._orders):
+                self._orders = self.shuffled_orders(self.rng, self.batch_size)
+                self._next_order = 0
+            order = self._orders[self._next_order]
+            self._next_order += 1
+        self.order = order
+        self.cursor = 0
 
     def deal(self, num=1):
-        dealt = self.cards[:num]
-        self.cards = self.cards[num:]
-        return dealt
+        start = self.cursor
+        self.cursor = min(start + num, 52)
+        return [CARDS[i] for i in self.order[start:self.cursor].tolist()]
+
+    @property
+    def cards(self):
+        return [CARDS[i] for i in self.order[self.cursor:].tolist()]
+
+    def __len__(self):
+        return 52 - self.cursor
@@ -1,9 +1,10 @@
 import torch
 import torch.nn as nn
 import torch.optim as optim
-import random
 import numpy as np
 
+from observation import OBS_SIZE, decode_compact
+
 class DQN(nn.Module):
     def __init__(self, input_dim, output_dim):
         super(DQN, self).__init__()
@@ -20,7 +21,17 @@ class DQN(nn.Module):
 
 
 class DQNAgent:
-    def __init__(self, input_dim, output_dim, lr=1e-3, gamma=0.99):
+    def __init__(self, input_dim, output_dim, lr=1e-3, gamma=0.99, rng=None, compact_obs=False):
+        # Exploration draws from `rng`; when one is given it also seeds torch's
+        # generator so the initial weights are reproducible.
+        self.rng = rng if rng is not None else np.random.default_rng()
+        if rng is not None:
+            torch.manual_seed(int(rng.integers(2**63)))
+        # With compact_obs, states arrive in the compact uint8 layout and are
+        # expanded to the dense network input here, a batch at a time.
+        self.compact_obs = compact_obs
+        if compact_obs:
+            input_dim = OBS_SIZE
         self.model = DQN(input_dim, output_dim)
         self.target_model = DQN(input_dim, output_dim)
         self.target_model.load_state_dict(self.model.state_dict())
@@ -29,26 +40,31 @@ class DQNAgent:
         self.optimizer = optim.Adam(self.model.parameters(), lr=lr)
         self.loss_fn = nn.MSELoss()
         self.gamma = gamma
+        self.td_errors = None
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model.to(self.device)
         self.target_model.to(self.device)
 
     def act(self, state, epsilon=0.1):
-        if random.random() < epsilon:
-            return random.randint(0, 3)  # 4 discrete actions: fold, check, call, raise
+        if self.rng.random() < epsilon:
+            return int(self.rng.integers(4))  # 4 discrete actions: fold, check, call, raise
+        if self.compact_obs:
+            state = decode_compact(np.asarray(state)[None])[0]
         with torch.no_grad():
-            state = torch.FloatTensor(state).to(self.device)
+            state = torch.as_tensor(state, dtype=torch.float32, device=self.device)
             q_values = self.model(state)
             return q_values.argmax().item()
 
-    def train_step(self, batch):
-        states, actions, rewards, next_states, dones = zip(*batch)
-
-        states = torch.FloatTensor(states).to(self.device)
-        next_states = torch.FloatTensor(next_states).to(self.device)
-        actions = torch.LongTensor(actions).to(self.device)
-        rewards = torch.FloatTensor(rewards).to(self.device)
-        dones = torch.FloatTensor(dones).to(self.device)
+    def train_step(self, batch, weights=None):
+        # batch: (states, actions, rewards, next_states, dones) tensors from ReplayBuffer.sample.
+        # weights: importance-sampling weights from PrioritizedReplayBuffer.sample.
+        # The batch's |TD errors| are left in self.td_errors for priority updates.
+        states, actions, rewards, next_states, dones = batch
+        if self.compact_obs:
+            states = torch.from_numpy(decode_compact(states.numpy()))
+            next_states = torch.from_numpy(decode_compact(next_states.numpy()))
+        states, actions, rewards, next_states, dones = (
+            t.to(self.device) for t in (states.float(), actions, rewards, next_states.float(), dones))
 
         q_vals = self.model(states)
         next_q_vals = self.target_model(next_states).detach()
@@ -57,7 +73,12 @@ class DQNAgent:
         max_next_q_val = next_q_vals.max(1)[0]
         target = rewards + self.gamma * max_next_q_val * (1 - dones)
 
-        loss = self.loss_fn(q_val, target)
+        td_errors = q_val - target
+        self.td_errors = td_errors.detach().abs().cpu().numpy()
+        if weights is None:
+            loss = self.loss_fn(q_val, target)
+        else:
+            loss = (weights.to(self.device) * td_errors.pow(2)).mean()
 
         self.optimizer.zero_grad()
         loss.backward()
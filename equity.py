@@ -0,0 +1,329 @@
+import itertools
+import math
+import time
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+from evaluator import evaluate_batch
+
+ALL_CARDS = np.arange(52, dtype=np.int64)
+
+# Spots with at most this many (runout, opponent holdings) combinations,
+# counted after suit-symmetry pruning, are enumerated exactly instead of
+# sampled. A heads-up river (990) takes ~0.35ms, about as long as 150
+# samples. Even a pruned heads-up turn is 19800+ and takes ~9ms, more than
+# the 1000 samples the adaptive estimator stops at, so turns are sampled.
+EXACT_LIMIT = 1000
+
+
+def unseen_cards(known):
+    dead = np.zeros(52, dtype=bool)
+    dead[list(known)] = True
+    return ALL_CARDS[~dead]
+
+
+def showdown_shares(my_scores, opp_scores):
+    # my_scores: (S,), opp_scores: (S, k). Pot share per sample with ties split evenly.
+    best_opp = opp_scores.min(axis=1)
+    tied = np.count_nonzero(opp_scores == my_scores[:, None], axis=1)
+    return np.where(my_scores < best_opp, 1.0, np.where(my_scores == best_opp, 1.0 / (tied + 1), 0.0))
+
+
+def sample_spot_shares(holes, boards, num_opponents, samples, rng):
+    # holes: (N, 2), boards: (N, k) card indices for N spots with the same k.
+    # Draws `samples` runouts plus opponent holdings per spot at once and
+    # returns the (N, samples) pot shares.
+    holes = np.asarray(holes, dtype=np.int64)
+    boards = np.asarray(boards, dtype=np.int64).reshape(len(holes), -1)
+    n = len(holes)
+    known = np.concatenate([holes, boards], axis=1)
+    missing = 5 - boards.shape[1]
+    draw = missing + 2 * num_opponents
+    # Known cards get keys above every random one, so they sort last.
+    keys = rng.random((n, samples, 52), dtype=np.float32)
+    keys[np.arange(n)[:, None], :, known] = 2.0
+    picks = np.argsort(keys, axis=2)[:, :, :draw].reshape(n * samples, draw)
+    full_board = np.concatenate([np.repeat(boards, samples, axis=0), picks[:, :missing]], axis=1)
+    my_scores = evaluate_batch(np.repeat(holes, samples, axis=0), full_board)
+    opp_scores = evaluate_batch(picks[:, missing:].reshape(-1, 2), np.repeat(full_board, num_opponents, axis=0))
+    return showdown_shares(my_scores, opp_scores.reshape(-1, num_opponents)).reshape(n, samples)
+
+
+def sample_shares(hole, board, num_opponents, samples, rng):
+    # Per-sample pot shares for a single spot.
+    return sample_spot_shares([hole], [board], num_opponents, samples, rng)[0]
+
+
+def batch_equity(holes, boards, num_opponents=1, samples=100, rng=None, chunk_rows=65536):
+    # holes: (N, 2), boards: (N, k) card indices for N independent spots.
+    # Returns an (N,) array of Monte Carlo equities, processed in chunks of
+    # at most `chunk_rows` spot-samples to bound memory.
+    if rng is None:
+        rng = np.random.default_rng()
+    holes = np.asarray(holes, dtype=np.int64)
+    boards = np.asarray(boards, dtype=np.int64).reshape(len(holes), -1)
+    equities = np.empty(len(holes))
+    step = max(1, chunk_rows // samples)
+    for start in range(0, len(holes), step):
+        rows = slice(start, start + step)
+        equities[rows] = sample_spot_shares(holes[rows], boards[rows], num_opponents, samples, rng).mean(axis=1)
+    return equities
+
+
+@lru_cache(maxsize=None)
+def _pair_sets(pool_size, num_opponents):
+    # Every way to give `num_opponents` disjoint, unordered hole-card pairs
+    # from positions 0..pool_size-1, as an (M, num_opponents * 2) array.
+    def extend(remaining, k):
+        if k == 0:
+            yield ()
+            return
+        first = remaining[0]
+        # The lowest free card either starts the next pair or is left undealt.
+        for j in range(1, len(remaining)):
+            rest = remaining[1:j] + remaining[j + 1:]
+            for tail in extend(rest, k - 1):
+                yield (first, remaining[j]) + tail
+        if len(remaining) > 2 * k:
+            yield from extend(remaining[1:], k)
+
+    return np.array(list(extend(tuple(range(pool_size)), num_opponents)), dtype=np.int64)
+
+
+def _num_pair_sets(pool_size, num_opponents):
+    ordered = math.prod(math.comb(pool_size - 2 * i, 2) for i in range(num_opponents))
+    return ordered // math.factorial(num_opponents)
+
+
+def _free_suits(known):
+    return sorted(set(range(4)) - {c // 13 for c in known})
+
+
+def exact_size(hole, board, num_opponents=1, limit=None):
+    # (runout, opponent holdings) combinations exact_equity evaluates. With a
+    # limit, skips the pruning when even the best case stays above it.
+    known = list(hole) + list(board)
+    unseen = 52 - len(known)
+    missing = 5 - len(board)
+    n_runouts = math.comb(unseen, missing)
+    n_sets = _num_pair_sets(unseen - missing, num_opponents)
+    free = len(_free_suits(known))
+    if missing > 0 and free >= 2:
+        if limit is not None and n_runouts // math.factorial(free) * n_sets > limit:
+            return n_runouts * n_sets
+        n_runouts = len(_canonical_runouts(tuple(sorted(known)), missing)[0])
+    return n_runouts * n_sets
+
+
+@lru_cache(maxsize=1024)
+def _canonical_runouts(known, missing):
+    # known: sorted tuple of dealt card indices. Suits that none of them use
+    # are interchangeable, so runouts that differ only by a permutation of
+    # those suits have the same equity. Returns one representative per class
+    # with its class size as weight (read-only, the result is cached).
+    runouts, weights = _canonical_runout_classes(known, missing)
+    runouts.flags.writeable = False
+    weights.flags.writeable = False
+    return runouts, weights
+
+
+def _canonical_runout_classes(known, missing):
+    if missing == 0:
+        return np.empty((1, 0), dtype=np.int64), np.ones(1)
+    pool = unseen_cards(known)
+    runouts = np.array(list(itertools.combinations(pool.tolist(), missing)), dtype=np.int64)
+    free_suits = _free_suits(known)
+    if len(free_suits) < 2:
+        return runouts, np.ones(len(runouts))
+    codes = []
+    for perm in itertools.permutations(free_suits):
+        suit_map = np.arange(4)
+        suit_map[free_suits] = perm
+        mapped = np.sort(suit_map[runouts // 13] * 13 + runouts % 13, axis=1)
+        codes.append((mapped * 52 ** np.arange(missing)).sum(axis=1))
+    canonical = np.min(codes, axis=0)
+    _, first, counts = np.unique(canonical, return_index=True, return_counts=True)
+    return runouts[first], counts.astype(np.float64)
+
+
+def exact_equity(hole, board, num_opponents=1):
+    # Enumerates every runout and every set of opponent holdings.
+    hole = list(hole)
+    board = list(board)
+    missing = 5 - len(board)
+    runouts, weights = _canonical_runouts(tuple(sorted(hole + board)), missing)
+    n_runouts = len(runouts)
+
+    full_board = np.empty((n_runouts, 5), dtype=np.int64)
+    full_board[:, :len(board)] = board
+    full_board[:, len(board):] = runouts
+    # Cards left for the opponents after each runout, one row per runout.
+    left = np.ones((n_runouts, 52), dtype=bool)
+    left[:, hole + board] = False
+    left[np.arange(n_runouts)[:, None], runouts] = False
+    opp_pool = np.nonzero(left)[1].reshape(n_runouts, -1)
+
+    pair_sets = _pair_sets(opp_pool.shape[1], num_opponents)
+    n_sets = len(pair_sets)
+    opp_holes = opp_pool[:, pair_sets].reshape(-1, 2)
+    my_scores = evaluate_batch(np.broadcast_to(np.asarray(hole), (n_runouts, 2)), full_board)
+    opp_scores = evaluate_batch(opp_holes, np.repeat(full_board, n_sets * num_opponents, axis=0))
+    shares = showdown_shares(np.repeat(my_scores, n_sets), opp_scores.reshape(-1, num_opponents))
+    per_runout = shares.reshape(n_runouts, n_sets).mean(axis=1)
+    return float(np.average(per_runout, weights=weights))
+
+
+# Estimates are kept as pooled pot-share sums (n, total, total_sq), so later
+# samples of the same spot add to them. An exact result is (None, equity, 0.0).
+NO_SAMPLES = (0, 0.0, 0.0)
+
+
+def pooled_estimate(n, total, total_sq):
+    # (equity, standard error) from pooled sums.
+    if n is None:
+        return total, 0.0
+    equity = total / n
+    # Floor the variance so a batch of identical outcomes is not treated as certain.
+    variance = 1 / (4 * n)
+    if n > 1:
+        variance = max((total_sq / n - equity * equity) * n / (n - 1), variance)
+    return equity, math.sqrt(variance / n)
+
+
+def add_samples(sums, hole, board, num_opponents, samples, rng):
+    shares = sample_shares(hole, board, num_opponents, samples, rng)
+    n, total, total_sq = sums
+    return n + samples, total + float(shares.sum()), total_sq + float(np.dot(shares, shares))
+
+
+def equity_sums(hole, board, num_opponents=1, samples=1000, rng=None, exact_limit=EXACT_LIMIT, sums=None):
+    # Pooled sums for the spot: exact when it is small enough, otherwise
+    # `samples` more samples on top of `sums`.
+    if sums is None:
+        if exact_size(hole, board, num_opponents, exact_limit) <= exact_limit:
+            return None, exact_equity(hole, board, num_opponents), 0.0
+        sums = NO_SAMPLES
+    if rng is None:
+        rng = np.random.default_rng()
+    return add_samples(sums, hole, board, num_opponents, samples, rng)
+
+
+def estimate_equity(hole, board, num_opponents=1, samples=1000, rng=None, exact_limit=EXACT_LIMIT):
+    # hole/board are card indices. Returns (equity, standard error) against
+    # `num_opponents` random holdings, completing the board to five cards.
+    # Small spots are enumerated exactly and report a standard error of 0.
+    return pooled_estimate(*equity_sums(hole, board, num_opponents, samples, rng, exact_limit))
+
+
+def is_decisive(equity, stderr, thresholds, z=2.0):
+    # True when the z-sigma interval around `equity` contains none of the thresholds.
+    return all(abs(equity - t) > z * stderr for t in thresholds)
+
+
+def adaptive_sums(hole, board, thresholds=(), num_opponents=1, batch_size=32, max_samples=1000,
+                  deadline=None, z=2.0, rng=None, exact_limit=EXACT_LIMIT, sums=None):
+    # Anytime estimate: adds batches to `sums` and stops as soon as the
+    # interval clears every threshold, the pooled count reaches max_samples or
+    # time.monotonic() passes `deadline`. At least one batch is always drawn.
+    if sums is None:
+        if exact_size(hole, board, num_opponents, exact_limit) <= exact_limit:
+            return None, exact_equity(hole, board, num_opponents), 0.0
+        sums = NO_SAMPLES
+    if rng is None:
+        rng = np.random.default_rng()
+    while True:
+        sums = add_samples(sums, hole, board, num_opponents, batch_size, rng)
+        if sums[0] >= max_samples or is_decisive(*pooled_estimate(*sums), thresholds, z):
+            return sums
+        if deadline is not None and time.monotonic() >= deadline:
+            return sums
+
+
+def estimate_equity_adaptive(hole, board, thresholds=(), num_opponents=1, batch_size=32, max_samples=1000,
+                             deadline=None, z=2.0, rng=None, exact_limit=EXACT_LIMIT):
+    # Returns (equity, stderr); see adaptive_sums.
+    return pooled_estimate(*adaptive_sums(hole, board, thresholds, num_opponents, batch_size, max_samples,
+                                          deadline, z, rng, exact_limit))
+
+
+def canonical_key(hole, board, num_opponents=1):
+    # Per-suit (hole ranks, board ranks) bitmasks, sorted so that
+    # suit-isomorphic spots map to the same key.
+    hole_mask = 0
+    for c in hole:
+        hole_mask |= 1 << c
+    board_mask = 0
+    for c in board:
+        board_mask |= 1 << c
+    suits = sorted(((hole_mask >> shift) & 0x1FFF, (board_mask >> shift) & 0x1FFF) for shift in (0, 13, 26, 39))
+    return tuple(suits), num_opponents
+
+
+class _FreezeToken:
+    __slots__ = ("__weakref__",)
+
+
+class EquityCache:
+    # Rough footprint of one entry: key tuples, value tuple and the OrderedDict node.
+    ENTRY_BYTES = 512
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_entries = max(1, max_bytes // self.ENTRY_BYTES)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._frozen = 0
+
+    def get(self, key, usable=None):
+        # Returns (entry, hit). An entry rejected by usable(entry) counts as a
+        # miss but is still returned, so the caller can refine it.
+        entry = self._entries.get(key)
+        if entry is None or (usable is not None and not usable(entry)):
+            self.misses += 1
+            return entry, False
+        self.hits += 1
+        if not self._frozen:
+            self._entries.move_to_end(key)
+        return entry, True
+
+    def put(self, key, value):
+        if self._frozen:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def freeze(self):
+        # Ignores puts and keeps the LRU order until the returned token is
+        # garbage collected. A table snapshot holds one, so every branch
+        # restored from it finds the same entries and its bots make the same
+        # RNG draws.
+        token = _FreezeToken()
+        self._frozen += 1
+        weakref.finalize(token, self._thaw)
+        return token
+
+    def _thaw(self):
+        self._frozen -= 1
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Process-wide cache shared by every StatisticalBot unless one is given explicitly.
+SHARED_CACHE = EquityCache()
@@ -0,0 +1,202 @@
+import argparse
+import itertools
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from equity import sample_shares, sample_spot_shares
+from evaluator import TABLE_DIR
+
+EQUITY_TABLE_PATH = os.path.join(TABLE_DIR, "equity_tables.bin")
+
+MAGIC = b"PKEQTBL1"
+HEADER_BYTES = 64
+MAX_OPPONENTS = 8
+NUM_STARTING_HANDS = 169
+
+
+def starting_hand_class(hole):
+    # 13x13 grid index: pairs on the diagonal, suited above it, offsuit below.
+    a, b = hole
+    high, low = max(a % 13, b % 13), min(a % 13, b % 13)
+    if a // 13 == b // 13:
+        return high * 13 + low
+    return low * 13 + high
+
+
+def _starting_hand_representative(cls):
+    row, col = divmod(cls, 13)
+    if row >= col:
+        # Pair or suited: both cards in the first suit (pairs use suits 0 and 1).
+        return [row, col + 13] if row == col else [row, col]
+    return [col, row + 13]
+
+
+def canonical_flop_keys(cards):
+    # cards: (M, 5) hole + flop indices. Relabels suits in order of their
+    # (hole ranks, flop ranks) signature and packs the sorted cards into 30 bits,
+    # so suit-isomorphic spots share a key.
+    cards = np.asarray(cards, dtype=np.int64)
+    suits, ranks = cards // 13, cards % 13
+    shift = np.array([13, 13, 0, 0, 0])
+    signature = np.zeros((len(cards), 4), dtype=np.int64)
+    for j in range(5):
+        np.add.at(signature, (np.arange(len(cards)), suits[:, j]), 1 << (ranks[:, j] + shift[j]))
+    order = np.argsort(-signature, axis=1, kind="stable")
+    relabel = np.empty_like(order)
+    np.put_along_axis(relabel, order, np.arange(4)[None, :], axis=1)
+    canon = np.take_along_axis(relabel, suits, axis=1) * 13 + ranks
+    canon = np.concatenate([np.sort(canon[:, :2], axis=1), np.sort(canon[:, 2:], axis=1)], axis=1)
+    return (canon << np.array([0, 6, 12, 18, 24])).sum(axis=1)
+
+
+def canonical_flop_key(hole, flop):
+    signature = [0, 0, 0, 0]
+    for c in hole:
+        signature[c // 13] += 1 << (c % 13 + 13)
+    for c in flop:
+        signature[c // 13] += 1 << (c % 13)
+    order = sorted(range(4), key=lambda s: -signature[s])
+    relabel = [0] * 4
+    for new, old in enumerate(order):
+        relabel[old] = new
+    canon = sorted(relabel[c // 13] * 13 + c % 13 for c in hole) + \
+        sorted(relabel[c // 13] * 13 + c % 13 for c in flop)
+    return sum(c << (6 * i) for i, c in enumerate(canon))
+
+
+def _decode_flop_keys(keys):
+    return (keys[:, None] >> np.array([0, 6, 12, 18, 24])) & 63
+
+
+def _all_canonical_flop_keys():
+    flops = np.array(list(itertools.combinations(range(52), 3)), dtype=np.int64)
+    keys = []
+    for cls in range(NUM_STARTING_HANDS):
+        hole = _starting_hand_representative(cls)
+        valid = flops[~np.isin(flops, hole).any(axis=1)]
+        cards = np.concatenate([np.broadcast_to(hole, (len(valid), 2)), valid], axis=1)
+        keys.append(np.unique(canonical_flop_keys(cards)))
+    return np.unique(np.concatenate(keys))
+
+
+def build_preflop_table(samples, rng):
+    table = np.zeros((NUM_STARTING_HANDS, MAX_OPPONENTS), dtype=np.float32)
+    for cls in range(NUM_STARTING_HANDS):
+        hole = _starting_hand_representative(cls)
+        for k in range(1, MAX_OPPONENTS + 1):
+            table[cls, k - 1] = sample_shares(hole, [], k, samples, rng).mean()
+    return table
+
+
+def build_flop_table(keys, samples, rng, chunk=2048):
+    # Heads-up equity for every canonical hole + flop spot.
+    equities = np.zeros(len(keys), dtype=np.float32)
+    for start in range(0, len(keys), chunk):
+        spots = _decode_flop_keys(keys[start:start + chunk])
+        shares = sample_spot_shares(spots[:, :2], spots[:, 2:], 1, samples, rng)
+        equities[start:start + chunk] = shares.mean(axis=1)
+    return equities
+
+
+def write_equity_tables(path, preflop, flop_keys, flop_equity, preflop_samples, flop_samples):
+    header = np.zeros(HEADER_BYTES // 8, dtype=np.int64)
+    header[1:5] = [MAX_OPPONENTS, len(flop_keys), preflop_samples, flop_samples]
+    header_bytes = bytearray(header.tobytes())
+    header_bytes[:8] = MAGIC
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header_bytes)
+        f.write(preflop.astype(np.float32).tobytes())
+        f.write(flop_keys.astype(np.uint32).tobytes())
+        f.write(flop_equity.astype(np.float32).tobytes())
+    os.replace(tmp_path, path)
+
+
+class EquityTables:
+    # Read-only memory map of the precomputed tables; worker processes that
+    # open the same file share its pages.
+    def __init__(self, path=EQUITY_TABLE_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            raw = f.read(HEADER_BYTES)
+        if raw[:8] != MAGIC:
+            raise ValueError(f"{path} is not an equity table file")
+        _, self.max_opponents, n_flop, self.preflop_samples, self.flop_samples = \
+            np.frombuffer(raw, dtype=np.int64)[:5].tolist()
+        offset = HEADER_BYTES
+        self.preflop_table = np.memmap(path, dtype=np.float32, mode="r", offset=offset,
+                                       shape=(NUM_STARTING_HANDS, self.max_opponents)).view(np.ndarray)
+        offset += self.preflop_table.nbytes
+        # Plain ndarray views over the mapping avoid np.memmap's per-call overhead.
+        self.flop_keys = np.memmap(path, dtype=np.uint32, mode="r", offset=offset,
+                                   shape=(n_flop,)).view(np.ndarray)
+        offset += self.flop_keys.nbytes
+        self.flop_equity = np.memmap(path, dtype=np.float32, mode="r", offset=offset,
+                                     shape=(n_flop,)).view(np.ndarray)
+
+    def preflop(self, hole, num_opponents=1):
+        if not 1 <= num_opponents <= self.max_opponents:
+            return None
+        return float(self.preflop_table[starting_hand_class(hole), num_opponents - 1])
+
+    def flop(self, hole, flop):
+        # Heads-up only; returns None for spots the table does not cover.
+        key = np.uint32(canonical_flop_key(hole, flop))
+        i = int(np.searchsorted(self.flop_keys, key))
+        if i == len(self.flop_keys) or self.flop_keys[i] != key:
+            return None
+        return float(self.flop_equity[i])
+
+    def flop_batch(self, holes, flops):
+        # holes: (N, 2), flops: (N, 3). NaN where a spot is not in the table.
+        keys = canonical_flop_keys(np.concatenate([holes, flops], axis=1)).astype(np.uint32)
+        i = np.minimum(np.searchsorted(self.flop_keys, keys), len(self.flop_keys) - 1)
+        return np.where(self.flop_keys[i] == keys, self.flop_equity[i], np.nan)
+
+    def stderr(self, equity, board_len):
+        # Binomial approximation from the samples each entry was built with
+        # (ties only lower it), floored like equity.pooled_estimate.
+        samples = self.preflop_samples if board_len == 0 else self.flop_samples
+        return np.sqrt(np.maximum(equity * (1 - equity), 1 / (4 * samples)) / samples)
+
+    def lookup(self, hole, board, num_opponents=1):
+        if len(board) == 0:
+            return self.preflop(hole, num_opponents)
+        if len(board) == 3 and num_opponents == 1:
+            return self.flop(hole, board)
+        return None
+
+
+@lru_cache(maxsize=None)
+def load_equity_tables(path=EQUITY_TABLE_PATH):
+    # None when the tables have not been built yet.
+    if not os.path.exists(path):
+        return None
+    return EquityTables(path)
+
+
+def build(path=EQUITY_TABLE_PATH, preflop_samples=20000, flop_samples=128, seed=0):
+    rng = np.random.default_rng(seed)
+    start = time.time()
+    preflop = build_preflop_table(preflop_samples, rng)
+    print(f"Preflop table done in {time.time() - start:.1f}s")
+    keys = _all_canonical_flop_keys()
+    print(f"{len(keys)} canonical flop spots")
+    flop_equity = build_flop_table(keys, flop_samples, rng)
+    print(f"Flop table done in {time.time() - start:.1f}s")
+    write_equity_tables(path, preflop, keys, flop_equity, preflop_samples, flop_samples)
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute preflop and flop equity tables")
+    parser.add_argument("--path", default=EQUITY_TABLE_PATH)
+    parser.add_argument("--preflop-samples", type=int, default=20000)
+    parser.add_argument("--flop-samples", type=int, default=128)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    build(args.path, args.preflop_samples, args.flop_samples, args.seed)
@@ -0,0 +1,287 @@
+import itertools
+import os
+
+import numpy as np
+
+# Scores follow the deuces scale: 1 (royal flush) .. 7462 (7-high), lower is better.
+MAX_STRAIGHT_FLUSH = 10
+MAX_FOUR_OF_A_KIND = 166
+MAX_FULL_HOUSE = 322
+MAX_FLUSH = 1599
+MAX_STRAIGHT = 1609
+MAX_THREE_OF_A_KIND = 2467
+MAX_TWO_PAIR = 3325
+MAX_PAIR = 6185
+MAX_HIGH_CARD = 7462
+NO_FLUSH = MAX_HIGH_CARD + 1
+
+RANK_CLASS_MAXES = [MAX_STRAIGHT_FLUSH, MAX_FOUR_OF_A_KIND, MAX_FULL_HOUSE, MAX_FLUSH, MAX_STRAIGHT,
+                    MAX_THREE_OF_A_KIND, MAX_TWO_PAIR, MAX_PAIR, MAX_HIGH_CARD]
+RANK_CLASS_TO_STRING = {1: 'Straight Flush', 2: 'Four of a Kind', 3: 'Full House', 4: 'Flush', 5: 'Straight',
+                        6: 'Three of a Kind', 7: 'Two Pair', 8: 'Pair', 9: 'High Card'}
+
+TABLE_DIR = os.environ.get("POKERAI_TABLE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables"))
+TABLE_PATH = os.path.join(TABLE_DIR, "evaluator.npz")
+TABLE_VERSION = 1
+
+# Non-flush hands are looked up by the sum of per-card rank keys. These keys give a
+# unique sum for every rank multiset of up to 7 cards; adding 1 << 23 per card
+# also encodes the card count, so 5-, 6- and 7-card hands share one table.
+RANK_KEYS = [0, 1, 5, 22, 98, 453, 2031, 8698, 22854, 83661, 262349, 636345, 1479181]
+COUNT_KEY = 1 << 23
+CARD_KEYS = [RANK_KEYS[i % 13] + COUNT_KEY for i in range(52)]
+
+# The 7.8M-wide key space is compressed with a row-displacement perfect hash:
+# slot = (key & ROW_MASK) + offsets[key >> ROW_SHIFT].
+ROW_SHIFT = 10
+ROW_MASK = (1 << ROW_SHIFT) - 1
+
+STRAIGHT_MASKS = [0b1111100000000 >> i for i in range(9)] + [0b1000000001111]
+
+
+def _five_card_ranks():
+    # Enumerates the 7462 distinct 5-card hands in deuces order.
+    desc = list(range(12, -1, -1))
+    flush5, unsuited5 = {}, {}
+    rank = 1
+
+    def add(table, key):
+        nonlocal rank
+        table[key] = rank
+        rank += 1
+
+    for mask in STRAIGHT_MASKS:
+        add(flush5, mask)
+    for quad in desc:
+        for kicker in desc:
+            if kicker != quad:
+                add(unsuited5, tuple(sorted((quad,) * 4 + (kicker,), reverse=True)))
+    for trips in desc:
+        for pair in desc:
+            if pair != trips:
+                add(unsuited5, tuple(sorted((trips,) * 3 + (pair,) * 2, reverse=True)))
+    high_cards = [c for c in itertools.combinations(desc, 5)
+                  if sum(1 << r for r in c) not in STRAIGHT_MASKS]
+    for combo in high_cards:
+        add(flush5, sum(1 << r for r in combo))
+    for mask in STRAIGHT_MASKS:
+        add(unsuited5, tuple(r for r in desc if mask >> r & 1))
+    for trips in desc:
+        for kickers in itertools.combinations([r for r in desc if r != trips], 2):
+            add(unsuited5, tuple(sorted((trips,) * 3 + kickers, reverse=True)))
+    for high, low in itertools.combinations(desc, 2):
+        for kicker in desc:
+            if kicker not in (high, low):
+                add(unsuited5, tuple(sorted((high, high, low, low, kicker), reverse=True)))
+    for pair in desc:
+        for kickers in itertools.combinations([r for r in desc if r != pair], 3):
+            add(unsuited5, tuple(sorted((pair, pair) + kickers, reverse=True)))
+    for combo in high_cards:
+        add(unsuited5, combo)
+    assert rank == MAX_HIGH_CARD + 1
+    return flush5, unsuited5
+
+
+def _build_flush_table(flush5):
+    table = np.full(1 << 13, NO_FLUSH, dtype=np.uint16)
+    for mask in range(1 << 13):
+        if mask.bit_count() < 5:
+            continue
+        best = next((flush5[s] for s in STRAIGHT_MASKS if mask & s == s), None)
+        if best is None:
+            top = 0
+            for r in range(12, -1, -1):
+                if mask >> r & 1 and top.bit_count() < 5:
+                    top |= 1 << r
+            best = flush5[top]
+        table[mask] = best
+    return table
+
+
+def _build_unsuited(unsuited5):
+    keys, values = [], []
+    for n in (5, 6, 7):
+        for ranks in itertools.combinations_with_replacement(range(12, -1, -1), n):
+            if any(ranks.count(r) > 4 for r in set(ranks)):
+                continue
+            keys.append(sum(RANK_KEYS[r] for r in ranks) + n * COUNT_KEY)
+            values.append(min(unsuited5[sub] for sub in set(itertools.combinations(ranks, 5))))
+    return np.array(keys, dtype=np.int64), np.array(values, dtype=np.uint16)
+
+
+def _build_perfect_hash(keys, values):
+    rows = keys >> ROW_SHIFT
+    cols = keys & ROW_MASK
+    n_rows = int(rows.max()) + 1
+    by_row = {}
+    for row, col in zip(rows.tolist(), cols.tolist()):
+        by_row.setdefault(row, []).append(col)
+
+    window = 4096
+    occupied = np.zeros(len(keys) * 2, dtype=bool)
+    offsets = np.zeros(n_rows, dtype=np.int32)
+    first_free = 0
+    # Densest rows first, each placed at the first offset where all its slots are free.
+    for row in sorted(by_row, key=lambda r: -len(by_row[r])):
+        row_cols = sorted(by_row[row])
+        base = row_cols[0]
+        rel = [c - base for c in row_cols]
+        start = first_free
+        while True:
+            if len(occupied) < start + window + ROW_MASK + 1:
+                occupied = np.concatenate([occupied, np.zeros(len(occupied), dtype=bool)])
+            clash = occupied[start:start + window].copy()
+            for r in rel[1:]:
+                clash |= occupied[start + r:start + r + window]
+            if not clash.all():
+                slot = start + int(np.argmin(clash))
+                break
+            start += window
+        occupied[[slot + r for r in rel]] = True
+        offsets[row] = slot - base
+        while occupied[first_free]:
+            first_free += 1
+
+    table = np.zeros(np.flatnonzero(occupied).max() + 1, dtype=np.uint16)
+    table[cols + offsets[rows]] = values
+    return offsets, table
+
+
+def build_tables():
+    flush5, unsuited5 = _five_card_ranks()
+    keys, values = _build_unsuited(unsuited5)
+    offsets, hash_table = _build_perfect_hash(keys, values)
+    return {
+        "version": np.array(TABLE_VERSION),
+        "flush": _build_flush_table(flush5),
+        "offsets": offsets,
+        "unsuited": hash_table,
+    }
+
+
+def _load_tables():
+    if os.path.exists(TABLE_PATH):
+        with np.load(TABLE_PATH) as data:
+            if int(data["version"]) == TABLE_VERSION:
+                return {k: data[k] for k in data.files}
+    tables = build_tables()
+    os.makedirs(TABLE_DIR, exist_ok=True)
+    tmp_path = f"{TABLE_PATH}.{os.getpid()}.tmp.npz"
+    np.savez(tmp_path, **tables)
+    os.replace(tmp_path, TABLE_PATH)
+    return tables
+
+
+_tables = _load_tables()
+FLUSH_TABLE = _tables["flush"]
+HASH_OFFSETS = _tables["offsets"]
+UNSUITED_TABLE = _tables["unsuited"]
+
+# Python lists are faster than numpy arrays for scalar lookups.
+_flush = FLUSH_TABLE.tolist()
+_offsets = HASH_OFFSETS.tolist()
+_unsuited = UNSUITED_TABLE.tolist()
+
+
+def evaluate_indices(indices):
+    # Scores 5 to 7 cards given as 0..51 indices.
+    if not 5 <= len(indices) <= 7:
+        raise ValueError(f"Can only evaluate 5 to 7 cards, got {len(indices)}")
+    key = 0
+    mask = 0
+    for i in indices:
+        key += CARD_KEYS[i]
+        mask |= 1 << i
+    for shift in (0, 13, 26, 39):
+        score = _flush[(mask >> shift) & 0x1FFF]
+        if score != NO_FLUSH:
+            return score
+    return _unsuited[(key & ROW_MASK) + _offsets[key >> ROW_SHIFT]]
+
+
+def evaluate(cards):
+    return evaluate_indices([c.index for c in cards])
+
+
+class IncrementalEvaluator:
+    # Evaluation state for a hand that grows one card at a time. The rank-key
+    # sum encodes the rank counts and the card mask holds every suit's rank
+    # mask, so adding a card and rescoring are a few table lookups.
+    __slots__ = ('key', 'mask', 'suit_counts', 'count', '_score')
+
+    def __init__(self, indices=()):
+        self.key = 0
+        self.mask = 0
+        self.suit_counts = [0, 0, 0, 0]
+        self.count = 0
+        self._score = None
+        for i in indices:
+            self.add(i)
+
+    def add(self, index):
+        bit = 1 << index
+        if self.mask & bit:
+            raise ValueError(f"Card {index} is already in the hand")
+        if self.count == 7:
+            raise ValueError("Can only evaluate 5 to 7 cards, got 8")
+        self.key += CARD_KEYS[index]
+        self.mask |= bit
+        self.suit_counts[index // 13] += 1
+        self.count += 1
+        self._score = None
+        return self
+
+    @property
+    def score(self):
+        if self._score is None:
+            if self.count < 5:
+                raise ValueError(f"Can only evaluate 5 to 7 cards, got {self.count}")
+            # With at most 7 cards only one suit can hold five, and a flush beats
+            # anything the remaining cards could make.
+            for suit, n in enumerate(self.suit_counts):
+                if n >= 5:
+                    self._score = _flush[(self.mask >> 13 * suit) & 0x1FFF]
+                    break
+            else:
+                self._score = _unsuited[(self.key & ROW_MASK) + _offsets[self.key >> ROW_SHIFT]]
+        return self._score
+
+    def copy(self):
+        other = IncrementalEvaluator()
+        other.key = self.key
+        other.mask = self.mask
+        other.suit_counts = self.suit_counts[:]
+        other.count = self.count
+        other._score = self._score
+        return other
+
+    def __len__(self):
+        return self.count
+
+
+def rank_class(score):
+    for rank_class_int, max_score in enumerate(RANK_CLASS_MAXES, start=1):
+        if score <= max_score:
+            return rank_class_int
+    raise ValueError(f"Invalid hand score: {score}")
+
+
+def class_to_string(rank_class_int):
+    return RANK_CLASS_TO_STRING[rank_class_int]
+
+
+CARD_KEYS_NP = np.array(CARD_KEYS, dtype=np.int64)
+CARD_BITS_NP = np.array([1 << i for i in range(52)], dtype=np.uint64)
+
+
+def evaluate_batch(hole, board):
+    # hole: (N, 2) card indices; board: (N, k) or a shared (k,) board, 3 <= k <= 5.
+    # Returns an (N,) array of deuces-scale scores.
+    hole = np.asarray(hole)
+    board = np.asarray(board)
+    key = CARD_KEYS_NP[hole].sum(axis=-1) + CARD_KEYS_NP[board].sum(axis=-1)
+    mask = CARD_BITS_NP[hole].sum(axis=-1) + CARD_BITS_NP[board].sum(axis=-1)
+    scores = UNSUITED_TABLE[(key & ROW_MASK) + HASH_OFFSETS[key >> ROW_SHIFT]]
+    for shift in (0, 13, 26, 39):
+        np.minimum(scores, FLUSH_TABLE[(mask >> np.uint64(shift)) & np.uint64(0x1FFF)], out=scores)
+    return scores
@@ -1,24 +1,70 @@
+import numpy as np
+from betting import BettingRound, award_pots
 from deck import Deck
+from equity import EquityCache
 from hand import Hand
+from seeding import seed_sequence
+from table_state import capture_table, restore_table
 
 from colorama import Fore, Style, init
 init(autoreset=True)
 
 class Game:
-    def __init__(self, starting_bet=10, verbose=False):
+    def __init__(self, starting_bet=10, verbose=False, seed=None, quiet=False, sink=None):
         self.players = []
-        self.deck = Deck()
+        # With a seed, the deck and every bot added later draw from their own stream spawned from it,
+        # and the bots share an equity cache private to this game so cache hits are reproducible too.
+        self.seed_sequence = None if seed is None else seed_sequence(seed)
+        self.equity_cache = None if seed is None else EquityCache()
+        self.deck = Deck(self._spawn_rng())
         self.community_cards = []
         self.pot = 0
         self.current_bet = 0
-        self.verbose = verbose
+        self.verbose = verbose and not quiet
         self.starting_bet = starting_bet
         self.round_over = False
+        # quiet turns off all printing; sink, if given, is called with an event
+        # dict for every action, board card and hand result.
+        self.quiet = quiet
+        self.sink = sink
+        self.hand_number = 0
+        self.game_log = []
+
+    def _spawn_rng(self):
+        if self.seed_sequence is None:
+            return None
+        return np.random.default_rng(self.seed_sequence.spawn(1)[0])
 
     def add_player(self, player):
+        if self.seed_sequence is not None and hasattr(player, "rng"):
+            player.rng = self._spawn_rng()
+        if self.equity_cache is not None and hasattr(player, "equity_cache"):
+            player.equity_cache = self.equity_cache
         self.players.append(player)
 
+    def snapshot(self):
+        return capture_table(self.players, self.deck, self.community_cards, self.pot, self.current_bet,
+                             (self.round_over,), self.equity_cache)
+
+    def restore(self, state):
+        self.community_cards = restore_table(state, self.players, self.deck)
+        self.pot = state.pot
+        self.current_bet = state.current_bet
+        self.round_over, = state.extra
+
+    def _print(self, text):
+        if not self.quiet:
+            print(text)
+
+    def _emit(self, event, **fields):
+        if self.sink is not None:
+            fields["event"] = event
+            fields["hand"] = self.hand_number
+            self.sink(fields)
+
     def reset_for_new_round(self):
+        self.hand_number += 1
+        self.game_log = []
         self.deck.reset()
         self.community_cards = []
         self.pot = 0
@@ -32,6 +78,7 @@ class Game:
             if player.stack >= self.starting_bet:
                 player.stack -= self.starting_bet
                 player.bet = self.starting_bet
+                player.contributed = self.starting_bet
                 self.pot += self.starting_bet
             else:
                 player.folded = True
@@ -42,59 +89,52 @@ class Game:
 
     def deal_community_cards(self, n):
         self.community_cards += self.deck.deal(n)
+        street = {3: "FLOP", 4: "TURN", 5: "RIVER"}[len(self.community_cards)]
+        if not self.quiet:
+            self.game_log.append(f"{street}: {self.community_cards}")
+        self._emit("board", street=street.lower(), board=[c.index for c in self.community_cards])
 
     def betting_round(self):
         if self.round_over:
             return
 
-        print(Fore.MAGENTA + "\n--- Betting Round ---")
-        print(Fore.MAGENTA + f"Community Cards: {self.community_cards}")
+        self._print(Fore.MAGENTA + "\n--- Betting Round ---")
+        self._print(Fore.MAGENTA + f"Community Cards: {self.community_cards}")
         if self.verbose:
             for p in self.players:
                 print(f"{p.name} stack: {p.stack}, folded: {p.folded}, bet: {p.bet}")
 
-        # Initialize
-        active_players = [p for p in self.players if not p.folded and p.stack > 0]
-        if len(active_players) == 1:
-            winner = active_players[0]
+        # All-in players are still in the hand; BettingRound skips them.
+        live_players = [p for p in self.players if not p.folded]
+        if len(live_players) == 1:
+            winner = live_players[0]
             winner.stack += self.pot
-            print(Fore.YELLOW + f"\n🏆 {winner.name} wins by default! Collected pot: {self.pot}")
+            self._print(Fore.YELLOW + f"\n🏆 {winner.name} wins by default! Collected pot: {self.pot}")
             self.round_over = True
             return
 
-        # Betting loop
-        while True:
-            bets_changed = False
-            for player in self.players:
-                if player.folded or player.stack == 0:
-                    continue
-
-                if all(p.bet == self.current_bet or p.folded or p.stack == 0 for p in self.players):
-                    continue  # Everyone matched, skip redundant actions
-
-                action = player.decide_action(self.current_bet, self.pot, self.community_cards, self.deck)
-                if self.verbose:
-                    print(Fore.LIGHTBLUE_EX + f"{player.name} decides to {action}")
-
-                if action["action"] == "fold":
-                    player.folded = True
-                elif action["action"] == "call":
-                    self.pot += action["amount"]
-                    bets_changed = True
-                elif action["action"] == "raise":
-                    self.pot += action["amount"]
-                    self.current_bet = player.bet
-                    bets_changed = True
-                elif action["action"] == "check":
-                    continue
-
-            # Check if all active players have equal bets or folded
-            active_bets = [p.bet for p in self.players if not p.folded and p.stack > 0]
-            if len(set(active_bets)) <= 1 or not bets_changed:
-                break
+        betting = BettingRound(self.players, self.pot)
+        while not betting.done:
+            player = betting.player
+            action = player.decide_action(betting.current_bet, betting.pot, self.community_cards, self.deck,
+                                          betting.live - 1)
+            if self.verbose:
+                print(Fore.LIGHTBLUE_EX + f"{player.name} decides to {action}")
+            kind, chips = betting.apply(action)
+            self._emit("action", player=player.name, action=kind, chips=chips, pot=betting.pot)
+        self.pot = betting.pot
+        self.current_bet = betting.current_bet
 
     def play_round(self):
+        # Plays one hand and returns each player's net chips for it.
         self.reset_for_new_round()
+        start = [p.stack + p.contributed for p in self.players]
+        self._play_streets()
+        net = [p.stack - s for p, s in zip(self.players, start)]
+        self._emit("result", net={p.name: n for p, n in zip(self.players, net)})
+        return net
+
+    def _play_streets(self):
         self.deal_hole_cards()
         if self.verbose:
             for p in self.players:
@@ -104,24 +144,21 @@ class Game:
         if self.round_over: return
 
         self.deal_community_cards(3)
-        self.game_log.append(f"FLOP: {self.community_cards}")
         self.betting_round()
         if self.round_over: return
 
         self.deal_community_cards(1)
-        self.game_log.append(f"TURN: {self.community_cards}")
         self.betting_round()
         if self.round_over: return
 
         self.deal_community_cards(1)
-        self.game_log.append(f"RIVER: {self.community_cards}")
         self.betting_round()
         if self.round_over: return
 
         self.determine_winner()
 
     def determine_winner(self):
-        print(Fore.MAGENTA + "\n--- Round Results ---")
+        self._print(Fore.MAGENTA + "\n--- Round Results ---")
         active = [p for p in self.players if not p.folded]
 
         self.winners = []
@@ -130,26 +167,27 @@ class Game:
             winner = active[0]
             winner.stack += self.pot
             self.winners = [winner]
-            print(Fore.YELLOW + f"\n🏆 {winner.name} wins by default! Collected pot: {self.pot}")
+            self._print(Fore.YELLOW + f"\n🏆 {winner.name} wins by default! Collected pot: {self.pot}")
             return
 
         # Evaluate hands
-        hands = [(p, Hand(p.hand, self.community_cards)) for p in active]
+        scores = {p: p.update_hand_state(self.community_cards).score for p in active}
 
-        for p, h in hands:
-            print(Fore.CYAN + f"{p.name}'s hand: {h}")
-
-        # Determine the winning hand
-        best_score = max(hands, key=lambda x: x[1])
-        best_players = [p for p, h in hands if h == best_score[1]]
-
-        for winner in best_players:
-            winner.stack += self.pot // len(best_players)
+        # Pay the main pot and any side pots
+        winnings = award_pots(self.players, [scores.get(p) for p in self.players])
+        best_players = [p for p, won in zip(self.players, winnings) if won > 0]
 
         self.winners = best_players
+        if self.quiet:
+            return
+
+        by_player = {p: Hand(p.hand, self.community_cards, score) for p, score in scores.items()}
+        for p, h in by_player.items():
+            print(Fore.CYAN + f"{p.name}'s hand: {h}")
 
         if len(best_players) == 1:
-            print(Fore.GREEN + f"\n🏆 {best_players[0].name} wins the pot of {self.pot} with {best_score[1]}")
+            print(Fore.GREEN + f"\n🏆 {best_players[0].name} wins the pot of {self.pot} with {by_player[best_players[0]]}")
         else:
-            print(Fore.GREEN + f"\n🏆 Tie between {[p.name for p in best_players]}! Split pot: {self.pot}")
+            won = {p.name: w for p, w in zip(self.players, winnings) if w > 0}
+            print(Fore.GREEN + f"\n🏆 Pot of {self.pot} split: {won}")
 
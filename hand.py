@@ -1,30 +1,40 @@
-from deuces import Card as DCard, Evaluator
-from collections import Counter
+from card import as_cards
+from evaluator import evaluate, rank_class, class_to_string
+from equity_tables import load_equity_tables
 
-suit_map = {'Spades': 's', 'Hearts': 'h', 'Diamonds': 'd', 'Clubs': 'c'}
-rank_map = {'10': 'T', 'J': 'J', 'Q': 'Q', 'K': 'K', 'A': 'A',
-            '2': '2', '3': '3', '4': '4', '5': '5', '6': '6',
-            '7': '7', '8': '8', '9': '9'}
 
-class Hand:
-    evaluator = Evaluator()
+def starting_hand_equity(hole_cards, num_opponents=1):
+    # Preflop equity from the precomputed tables, None if they are not built.
+    tables = load_equity_tables()
+    if tables is None:
+        return None
+    return tables.preflop([c.index for c in as_cards(hole_cards)], num_opponents)
 
-    def __init__(self, hole_cards, community_cards):
-        self.hole_cards = hole_cards
-        self.community_cards = community_cards
-        self.player_cards = [self._to_deuce(c) for c in hole_cards]
-        self.board_cards = [self._to_deuce(c) for c in community_cards]
-        self.score = self.evaluator.evaluate(self.board_cards, self.player_cards)
-        self.rank = self.evaluator.class_to_string(self.evaluator.get_rank_class(self.score))
 
-    def _to_deuce(self, card):
-        rank = rank_map.get(card.rank, card.rank)
-        suit = suit_map[card.suit]
-        return DCard.new(f"{rank}{suit}")
+class Hand:
+    def __init__(self, hole_cards, community_cards, score=None):
+        # Cards may be given as Card objects, 0..51 indices or 52-bit masks.
+        # A score already known, e.g. from an IncrementalEvaluator, skips evaluation.
+        self.hole_cards = as_cards(hole_cards)
+        self.community_cards = as_cards(community_cards)
+        self.score = evaluate(self.hole_cards + self.community_cards) if score is None else score
+
+    @property
+    def rank(self):
+        return class_to_string(rank_class(self.score))
+
+    @property
+    def equity(self):
+        # Heads-up flop equity from the precomputed tables; None on other
+        # streets or if the tables are not built.
+        tables = load_equity_tables()
+        if tables is None:
+            return None
+        return tables.lookup([c.index for c in self.hole_cards], [c.index for c in self.community_cards])
 
     def compare(self, other):
         return (self.score < other.score) - (self.score > other.score)
-    
+
     def __lt__(self, other):
         return self.score > other.score
 
@@ -33,9 +43,8 @@ class Hand:
 
 
     def __str__(self):
-        from deuces import Card as DCard
-        hole_str = " ".join([DCard.int_to_pretty_str(c) for c in self.player_cards])
-        board_str = " ".join([DCard.int_to_pretty_str(c) for c in self.board_cards])
+        hole_str = " ".join(repr(c) for c in self.hole_cards)
+        board_str = " ".join(repr(c) for c in self.community_cards)
         return f"{self.rank} | Hole: {hole_str} | Board: {board_str}"
 
     __repr__ = __str__
@@ -0,0 +1,170 @@
+import glob
+import json
+import os
+import time
+
+import numpy as np
+
+# Each run writes under its own directory (root/<run id>), and each writer in
+# it owns one shard directory holding a raw little-endian file per column.
+# Rows are appended a chunk at a time, so readers can memory-map every
+# column and index all of them with the same row numbers.
+COLUMNS = [
+    ("episode", "<u4", ()),
+    ("phase", "u1", ()),
+    ("player", "u1", ()),
+    ("action", "u1", ()),
+    ("amount", "<i4", ()),
+    ("pot", "<i4", ()),
+    ("stack", "<i4", ()),
+    ("board", "u1", (5,)),
+    ("hole", "u1", (2,)),
+]
+PHASES = ["preflop", "flop", "turn", "river", "showdown"]
+ACTIONS = ["fold", "check", "call", "raise", "hand", "wins_by_fold", "result"]
+NO_CARD = 255
+FORMAT_VERSION = 1
+
+
+def _padded(cards, width):
+    return list(cards) + [NO_CARD] * (width - len(cards))
+
+
+class HandHistoryWriter:
+    # Takes the same record tuples as ActionLogger: (episode, phase, player,
+    # action, amount, pot, stack, board indices, hole indices).
+    def __init__(self, root, chunk_rows=65536):
+        os.makedirs(root, exist_ok=True)
+        shard = 0
+        while True:
+            # Creating the directory claims the shard, so parallel workers never share one.
+            self.path = os.path.join(root, f"shard-{os.getpid()}-{shard}")
+            try:
+                os.makedirs(self.path)
+                break
+            except FileExistsError:
+                shard += 1
+        self.chunk_rows = chunk_rows
+        self.players = []
+        self._player_ids = {}
+        self._phase_ids = {name: i for i, name in enumerate(PHASES)}
+        self._action_ids = {name: i for i, name in enumerate(ACTIONS)}
+        self._chunk = {name: np.empty((chunk_rows,) + shape, dtype=dtype) for name, dtype, shape in COLUMNS}
+        self._rows = 0
+        self._files = {name: open(os.path.join(self.path, f"{name}.bin"), "ab") for name, _, _ in COLUMNS}
+        self._write_meta()
+
+    def _write_meta(self):
+        meta = {"version": FORMAT_VERSION, "columns": [[name, dtype, list(shape)] for name, dtype, shape in COLUMNS],
+                "phases": PHASES, "actions": ACTIONS, "players": self.players}
+        tmp_path = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+
+    def _player_id(self, name):
+        player_id = self._player_ids.get(name)
+        if player_id is None:
+            player_id = self._player_ids[name] = len(self.players)
+            self.players.append(name)
+            self._write_meta()
+        return player_id
+
+    def append(self, records):
+        start = 0
+        while start < len(records):
+            take = min(len(records) - start, self.chunk_rows - self._rows)
+            part = records[start:start + take]
+            rows = slice(self._rows, self._rows + take)
+            episode, phase, player, action, amount, pot, stack, board, hole = zip(*part)
+            chunk = self._chunk
+            chunk["episode"][rows] = episode
+            chunk["phase"][rows] = [self._phase_ids[p] for p in phase]
+            chunk["player"][rows] = [self._player_id(p) for p in player]
+            chunk["action"][rows] = [self._action_ids[a] for a in action]
+            chunk["amount"][rows] = amount
+            chunk["pot"][rows] = pot
+            chunk["stack"][rows] = stack
+            chunk["board"][rows] = [_padded(b, 5) for b in board]
+            chunk["hole"][rows] = [_padded(h, 2) for h in hole]
+            self._rows += take
+            start += take
+            if self._rows == self.chunk_rows:
+                self.flush()
+
+    def flush(self):
+        for name, f in self._files.items():
+            f.write(self._chunk[name][:self._rows].tobytes())
+            f.flush()
+        self._rows = 0
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            f.close()
+
+
+def read_shard(path):
+    # Returns ({column: read-only array}, meta). Columns are trimmed to the
+    # shortest one, so a shard cut off mid-chunk still reads consistently.
+    with open(os.path.join(path, "meta.json")) as f:
+        meta = json.load(f)
+    columns = {}
+    for name, dtype, shape in meta["columns"]:
+        file_path = os.path.join(path, f"{name}.bin")
+        row_bytes = np.dtype(dtype).itemsize * int(np.prod(shape))
+        n_rows = os.path.getsize(file_path) // row_bytes
+        if n_rows == 0:
+            columns[name] = np.empty((0,) + tuple(shape), dtype=dtype)
+        else:
+            columns[name] = np.memmap(file_path, dtype=dtype, mode="r",
+                                      shape=(n_rows,) + tuple(shape)).view(np.ndarray)
+    n_rows = min(len(column) for column in columns.values())
+    return {name: column[:n_rows] for name, column in columns.items()}, meta
+
+
+def new_run_id():
+    # Run directories sort by start time; the pid keeps runs started in the same second apart.
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+
+def run_paths(root):
+    # Run directories under a hand-history root, oldest first.
+    return sorted(p for p in glob.glob(os.path.join(root, "*"))
+                  if os.path.isdir(p) and not os.path.basename(p).startswith("shard-"))
+
+
+def latest_run(root):
+    runs = run_paths(root)
+    return runs[-1] if runs else None
+
+
+def _shard_order(path):
+    _, pid, n = os.path.basename(path).split("-")
+    return int(pid), int(n)
+
+
+def shard_paths(run):
+    return sorted((p for p in glob.glob(os.path.join(run, "shard-*")) if os.path.isdir(p)), key=_shard_order)
+
+
+def iter_shards(run):
+    for path in shard_paths(run):
+        yield read_shard(path)
+
+
+def agent_results(run, player="RLAgent"):
+    # Per-hand reward of `player` from the "result" rows of one run. Parallel
+    # envs each write a shard and number their hands from 1, so the rows come
+    # shard by shard, each shard in the order its env played the hands.
+    episodes, rewards = [], []
+    for columns, meta in iter_shards(run):
+        if player not in meta["players"]:
+            continue
+        rows = (columns["action"] == meta["actions"].index("result")) & \
+            (columns["player"] == meta["players"].index(player))
+        episodes.append(columns["episode"][rows])
+        rewards.append(columns["amount"][rows])
+    if not episodes:
+        return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.int32)
+    return np.concatenate(episodes), np.concatenate(rewards)
@@ -0,0 +1,97 @@
+import numpy as np
+
+from hand_history import NO_CARD
+
+OBS_SIZE = 107
+BOARD_OFFSET = 52
+POT, STACK, STRENGTH = 104, 105, 106
+
+
+class ObservationBuilder:
+    # Writes the RLPokerEnv observation (hole one-hot, board one-hot, pot,
+    # stack, hand strength) into a float32 buffer: its own by default, or a
+    # caller's array such as a row of a shared batch. Only the card bits that
+    # changed since the previous build are touched.
+    def __init__(self, out=None):
+        self.bind(out)
+
+    def bind(self, out=None):
+        self.out = np.zeros(OBS_SIZE, dtype=np.float32) if out is None else out
+        self.out[:] = 0
+        self._hole = ()
+        self._board = []
+
+    def build(self, hole, board, pot, stack, strength):
+        # hole, board: card indices.
+        out = self.out
+        hole = tuple(hole)
+        if hole != self._hole:
+            for i in self._hole:
+                out[i] = 0
+            for i in hole:
+                out[i] = 1
+            self._hole = hole
+        known = len(self._board)
+        if len(board) < known or board[:known] != self._board:
+            for i in self._board:
+                out[BOARD_OFFSET + i] = 0
+            self._board = []
+            known = 0
+        for i in board[known:]:
+            out[BOARD_OFFSET + i] = 1
+            self._board.append(i)
+        out[POT] = pot / 1000
+        out[STACK] = stack / 1000
+        out[STRENGTH] = strength
+        return out
+
+
+# Compact observation, 12 bytes instead of 428: the 7 card ids (hole, then
+# board, NO_CARD where not dealt), pot and stack in chips as little-endian
+# uint16, and strength quantized to 1/255. decode_compact expands a batch
+# back to the dense layout above.
+COMPACT_SIZE = 12
+COMPACT_BOARD = 2
+COMPACT_POT, COMPACT_STACK, COMPACT_STRENGTH = 7, 9, 11
+
+
+def encode_compact_scalars(out, pot, stack, strength):
+    # out: (N, COMPACT_SIZE) uint8 with a contiguous last axis.
+    chips = out[:, COMPACT_POT:COMPACT_STRENGTH].view("<u2")
+    chips[:, 0] = np.clip(pot, 0, 0xFFFF)
+    chips[:, 1] = np.clip(stack, 0, 0xFFFF)
+    out[:, COMPACT_STRENGTH] = np.clip(np.rint(np.asarray(strength) * 255), 0, 255)
+
+
+class CompactObservationBuilder:
+    # Same interface as ObservationBuilder for the compact layout.
+    def __init__(self, out=None):
+        self.bind(out)
+
+    def bind(self, out=None):
+        self.out = np.zeros(COMPACT_SIZE, dtype=np.uint8) if out is None else out
+        self.out[:] = 0
+
+    def build(self, hole, board, pot, stack, strength):
+        out = self.out
+        out[:COMPACT_BOARD] = hole
+        out[COMPACT_BOARD:COMPACT_BOARD + len(board)] = board
+        out[COMPACT_BOARD + len(board):COMPACT_POT] = NO_CARD
+        encode_compact_scalars(out[None], pot, stack, strength)
+        return out
+
+
+def decode_compact(compact, out=None):
+    # (N, COMPACT_SIZE) uint8 -> (N, OBS_SIZE) float32 dense observations.
+    compact = np.ascontiguousarray(compact)
+    dense = np.zeros((len(compact), OBS_SIZE), dtype=np.float32) if out is None else out
+    if out is not None:
+        dense[:] = 0
+    cards = compact[:, :COMPACT_POT].astype(np.intp)
+    rows, slots = np.nonzero(cards != NO_CARD)
+    dense[rows, cards[rows, slots] + np.where(slots < COMPACT_BOARD, 0, BOARD_OFFSET)] = 1
+    chips = compact[:, COMPACT_POT:COMPACT_STRENGTH].view("<u2")
+    dense[:, POT] = chips[:, 0] / 1000
+    dense[:, STACK] = chips[:, 1] / 1000
+    dense[:, STRENGTH] = compact[:, COMPACT_STRENGTH] / 255
+    return dense
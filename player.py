@@ -1,5 +1,8 @@
-import random
-from hand import Hand
+import time
+import numpy as np
+from equity import SHARED_CACHE, adaptive_sums, canonical_key, equity_sums, is_decisive, pooled_estimate
+from equity_tables import load_equity_tables
+from evaluator import IncrementalEvaluator
 
 RAISE_AMOUNT = 10
 
@@ -10,24 +13,42 @@ class Player:
         self.stack = stack
         self.hand = []  # 2 hole cards
         self.bet = 0
+        self.contributed = 0  # chips put in over the whole hand, for side pots
         self.folded = False
+        self.hand_state = None
+        self._state_hand = None
+
+    def update_hand_state(self, community_cards):
+        # Keeps one IncrementalEvaluator over hole + board for the whole hand and
+        # only feeds it the board cards dealt since the last call.
+        state = self.hand_state
+        if state is None or self._state_hand is not self.hand or len(community_cards) < len(state) - 2:
+            state = self.hand_state = IncrementalEvaluator(c.index for c in self.hand)
+            self._state_hand = self.hand
+        for card in community_cards[len(state) - 2:]:
+            state.add(card.index)
+        return state
 
     def reset(self):
         self.hand = []
         self.folded = False
         self.bet = 0
+        self.contributed = 0
 
     def reset_for_round(self):
         self.hand = []
         self.bet = 0
+        self.contributed = 0
         self.folded = False
 
-    def decide_action(self, current_bet, pot, community_cards=None, deck=None):
+    def decide_action(self, current_bet, pot, community_cards=None, deck=None, num_opponents=1):
+        # Returns an action dict; stacks and bets are updated by BettingRound.
+        # num_opponents is how many other players are still in the hand.
         raise NotImplementedError("Subclasses must implement decide_action()")
 
 
 class Human(Player):
-    def decide_action(self, current_bet, pot, community_cards=None, deck=None):
+    def decide_action(self, current_bet, pot, community_cards=None, deck=None, num_opponents=1):
         print(f"\n{self.name}, your hand: {self.hand}")
         print(f"Community cards: {community_cards}")
         print(f"Pot: {pot}, Current bet: {current_bet}, Your bet: {self.bet}, Your stack: {self.stack}")
@@ -44,13 +65,9 @@ class Human(Player):
                 elif action == 2:
                     call_amount = current_bet - self.bet
                     actual_call = min(self.stack, call_amount)
-                    self.stack -= actual_call
-                    self.bet += actual_call
                     return {"action": "call", "amount": actual_call}
                 elif action == 3:
                     raise_amount = min(self.stack, RAISE_AMOUNT)
-                    self.stack -= raise_amount
-                    self.bet += raise_amount
                     return {"action": "raise", "amount": raise_amount}
                 else:
                     print("Invalid input or can't check when there's a bet.")
@@ -60,13 +77,14 @@ class Human(Player):
 
 
 class RandomBot(Player):
-    def __init__(self, name, stack=1000, verbose=False):
+    def __init__(self, name, stack=1000, verbose=False, rng=None):
         super().__init__(name, stack)
         self.verbose = verbose
+        self.rng = rng if rng is not None else np.random.default_rng()
 
-    def decide_action(self, current_bet, pot, community_cards=None, deck=None):
+    def decide_action(self, current_bet, pot, community_cards=None, deck=None, num_opponents=1):
         actions = ['fold', 'call', 'raise', 'check'] if current_bet > self.bet else ['check', 'raise']
-        action = random.choice(actions)
+        action = actions[self.rng.integers(len(actions))]
 
         if action == 'fold':
             self.folded = True
@@ -76,15 +94,11 @@ class RandomBot(Player):
         elif action == 'call':
             call_amount = current_bet - self.bet
             actual_call = min(call_amount, self.stack)
-            self.stack -= actual_call
-            self.bet += actual_call
             if self.verbose:
                 print(f"{self.name} CALLS {actual_call}")
             return {"action": "call", "amount": actual_call}
         elif action == 'raise':
             raise_amount = min(self.stack, RAISE_AMOUNT)
-            self.stack -= raise_amount
-            self.bet += raise_amount
             if self.verbose:
                 print(f"{self.name} RAISES {raise_amount}")
             return {"action": "raise", "amount": raise_amount}
@@ -96,7 +110,9 @@ class RandomBot(Player):
 
 class StatisticalBot(Player):
     def __init__(self, name, stack=1000, preflop_raise=0.9, preflop_call=0.5,
-                 postflop_raise=0.7, postflop_call=0.4, simulations=100, verbose=False):
+                 postflop_raise=0.7, postflop_call=0.4, simulations=100, verbose=False,
+                 equity_cache=SHARED_CACHE, use_equity_tables=True, adaptive=True,
+                 max_simulations=1000, batch_size=32, confidence_z=2.0, time_budget=None, rng=None):
         super().__init__(name, stack)
         self.preflop_raise = preflop_raise
         self.preflop_call = preflop_call
@@ -104,40 +120,70 @@ class StatisticalBot(Player):
         self.postflop_call = postflop_call
         self.simulations = simulations
         self.verbose = verbose
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.equity_cache = equity_cache  # None disables caching
+        self.use_equity_tables = use_equity_tables
+        # Adaptive mode samples in batches until the estimate is clearly above or
+        # below the call/raise thresholds, up to max_simulations or time_budget seconds.
+        self.adaptive = adaptive
+        self.max_simulations = max_simulations
+        self.batch_size = batch_size
+        self.confidence_z = confidence_z
+        self.time_budget = time_budget
+
+    def _estimate(self, hole, board, num_opponents, thresholds, sums=None):
+        # Pooled share sums for the spot, continuing `sums` from an earlier estimate.
+        if not self.adaptive:
+            return equity_sums(hole, board, num_opponents, self.simulations, self.rng, sums=sums)
+        deadline = time.monotonic() + self.time_budget if self.time_budget is not None else None
+        return adaptive_sums(hole, board, thresholds, num_opponents, self.batch_size,
+                             self.max_simulations, deadline, self.confidence_z, self.rng, sums=sums)
+
+    def _settled(self, sums, thresholds):
+        # Exact, sampled up to this bot's limit, or already clear of its thresholds.
+        n = sums[0]
+        limit = self.max_simulations if self.adaptive else self.simulations
+        return n is None or n >= limit or is_decisive(*pooled_estimate(*sums), thresholds, self.confidence_z)
+
+    def estimate_win_probability(self, community_cards, num_opponents=1, thresholds=()):
+        hole = [c.index for c in self.hand]
+        board = [c.index for c in community_cards]
+        tables = load_equity_tables() if self.use_equity_tables else None
+        if tables is not None:
+            equity = tables.lookup(hole, board, num_opponents)
+            # Table entries are sampled too; near a threshold, estimate the spot instead.
+            if equity is not None and is_decisive(equity, tables.stderr(equity, len(board)), thresholds,
+                                                  self.confidence_z):
+                return equity
+        if self.equity_cache is None:
+            return pooled_estimate(*self._estimate(hole, board, num_opponents, thresholds))[0]
+
+        key = canonical_key(hole, board, num_opponents)
+        # A cached estimate too noisy for this bot's thresholds counts as a miss
+        # and new samples are pooled into it.
+        sums, hit = self.equity_cache.get(key, lambda entry: self._settled(entry, thresholds))
+        if not hit:
+            sums = self._estimate(hole, board, num_opponents, thresholds, sums)
+            self.equity_cache.put(key, sums)
+        return pooled_estimate(*sums)[0]
+
+    def decide_action(self, current_bet, pot, community_cards=None, deck=None, num_opponents=1):
+        if community_cards is None:
+            raise ValueError("StatisticalBot requires community cards")
 
-    def estimate_win_probability(self, community_cards, deck, num_opponents=1):
-        wins = 0
-        pool = [card for card in deck.cards if card not in self.hand + community_cards]
-        for _ in range(self.simulations):
-            random.shuffle(pool)
-            opp_hands = [pool[i:i+2] for i in range(0, num_opponents * 2, 2)]
-            my_hand = Hand(self.hand, community_cards)
-            opp_hands_eval = [Hand(h, community_cards) for h in opp_hands]
-            if all(my_hand.compare(opp) >= 0 for opp in opp_hands_eval):
-                wins += 1
-        return wins / self.simulations
-
-    def decide_action(self, current_bet, pot, community_cards=None, deck=None):
-        if community_cards is None or deck is None:
-            raise ValueError("StatisticalBot requires community cards and deck")
-
-        win_prob = self.estimate_win_probability(community_cards, deck)
         phase = 'preflop' if len(community_cards) == 0 else 'postflop'
         raise_thresh = getattr(self, f"{phase}_raise")
         call_thresh = getattr(self, f"{phase}_call")
+        win_prob = self.estimate_win_probability(community_cards, num_opponents, (call_thresh, raise_thresh))
 
         if win_prob >= raise_thresh:
             amount = min(self.stack, RAISE_AMOUNT)
-            self.stack -= amount
-            self.bet += amount
             if self.verbose:
                 print(f"{self.name} RAISES (win_prob={win_prob:.2f})")
             return {"action": "raise", "amount": amount}
         elif win_prob >= call_thresh:
             call_amt = current_bet - self.bet
             actual_call = min(self.stack, call_amt)
-            self.stack -= actual_call
-            self.bet += actual_call
             if self.verbose:
                 print(f"{self.name} CALLS (win_prob={win_prob:.2f})")
             return {"action": "call", "amount": actual_call}
@@ -161,22 +207,18 @@ class RLBot(Player):
     def set_action(self, action_dict):
         self._action = action_dict
 
-    def decide_action(self, current_bet, pot, community_cards=None, deck=None):
+    def decide_action(self, current_bet, pot, community_cards=None, deck=None, num_opponents=1):
         if self._action is None:
             raise RuntimeError("RLBot must have an action set before calling decide_action()")
         action = self._action
         self._action = None  # Clear after use
 
         if action["action"] == "raise":
-            raise_amount = min(self.stack, RAISE_AMOUNT)
-            self.stack -= raise_amount
-            self.bet += raise_amount
+            raise_amount = min(self.stack, action.get("amount", RAISE_AMOUNT))
             return {"action": "raise", "amount": raise_amount}
         elif action["action"] == "call":
             call_amount = current_bet - self.bet
             actual_call = min(self.stack, call_amount)
-            self.stack -= actual_call
-            self.bet += actual_call
             return {"action": "call", "amount": actual_call}
         elif action["action"] == "fold":
             self.folded = True
@@ -1,17 +1,23 @@
 import matplotlib.pyplot as plt
-import pandas as pd
+import numpy as np
 import os
+import sys
+from hand_history import agent_results, latest_run
 
-log_path = "logs/poker_log.csv"
-if not os.path.exists(log_path):
-    print("No log file found.")
+# One run: the id given on the command line, or the latest under logs/hand_history.
+history_root = "logs/hand_history"
+run = os.path.join(history_root, sys.argv[1]) if len(sys.argv) > 1 else latest_run(history_root)
+if run is None or not os.path.isdir(run):
+    print("No hand history found.")
 else:
-    df = pd.read_csv(log_path)
-    df["rolling_reward"] = df["stack_delta"].rolling(window=100).mean()
+    print(f"Plotting run {os.path.basename(run)}")
+    _, rewards = agent_results(run)
+    hands = np.arange(1, len(rewards) + 1)
+    rolling_reward = np.convolve(rewards, np.ones(100) / 100, mode="valid")
 
     plt.figure(figsize=(12, 6))
-    plt.plot(df["episode"], df["stack_delta"], alpha=0.4, label="Reward per Episode")
-    plt.plot(df["episode"], df["rolling_reward"], linewidth=2, label="Rolling Avg (100)", color="blue")
+    plt.plot(hands, rewards, alpha=0.4, label="Reward per Episode")
+    plt.plot(hands[99:], rolling_reward, linewidth=2, label="Rolling Avg (100)", color="blue")
     plt.title("RL Agent Poker Training Progress")
     plt.xlabel("Episode")
     plt.ylabel("Reward (Δ Stack)")
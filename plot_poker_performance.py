@@ -1,26 +1,29 @@
-
-import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 import os
+import sys
+from hand_history import agent_results, latest_run
 
-log_path = "logs/poker_log.csv"
-if not os.path.exists(log_path):
-    print("CSV log file not found.")
+# One run: the id given on the command line, or the latest under logs/hand_history.
+history_root = "logs/hand_history"
+run = os.path.join(history_root, sys.argv[1]) if len(sys.argv) > 1 else latest_run(history_root)
+if run is None or not os.path.isdir(run):
+    print("Hand history not found.")
     exit()
 
-df = pd.read_csv(log_path)
+print(f"Plotting run {os.path.basename(run)}")
+episodes, rewards = agent_results(run)
 
-# Map result to score
-score_map = {"win": 1, "tie": 0, "loss": -1}
-df["score"] = df["result"].map(score_map)
-print(df.head())
+# Map result to score: +1 win, 0 tie, -1 loss
+score = np.sign(rewards)
+print(np.column_stack([episodes, rewards, score])[:5])
 
 # Compute cumulative sum
-df["cumulative_score"] = df["score"].cumsum()
+cumulative_score = np.cumsum(score)
 
 # Plot
 plt.figure(figsize=(10, 5))
-plt.plot(df["episode"], df["cumulative_score"], marker='o', linestyle='-')
+plt.plot(np.arange(1, len(score) + 1), cumulative_score, marker='o', linestyle='-')
 plt.title("RL Agent Performance Over Time")
 plt.xlabel("Episode")
 plt.ylabel("Cumulative Score (+1 win, 0 tie, -1 loss)")
@@ -1,15 +1,295 @@
-import random
-from collections import deque
+import fcntl
+import json
+import os
+from contextlib import contextmanager
+
+import numpy as np
+import torch
+
+from observation import OBS_SIZE
+
 
 class ReplayBuffer:
+    # Transitions live in preallocated arrays used as a ring. sample() draws
+    # random indices, gathers each field once and wraps the result with
+    # torch.from_numpy, so building the batch tensors copies nothing more.
+    def __init__(self, capacity, obs_shape=(OBS_SIZE,), obs_dtype=np.float32, rng=None):
+        self.capacity = capacity
+        self.rng = rng if rng is not None else np.random.default_rng()
+        for name, dtype, shape in self.fields(obs_shape, obs_dtype):
+            setattr(self, name, self._allocate(name, dtype, shape))
+        self.pos = 0
+        self.size = 0
+
+    @staticmethod
+    def fields(obs_shape, obs_dtype):
+        # (name, dtype, per-row shape); dones are float so they go straight into the TD target.
+        return [
+            ("obs", np.dtype(obs_dtype), tuple(obs_shape)),
+            ("next_obs", np.dtype(obs_dtype), tuple(obs_shape)),
+            ("actions", np.dtype(np.int64), ()),
+            ("rewards", np.dtype(np.float32), ()),
+            ("dones", np.dtype(np.float32), ()),
+        ]
+
+    def _allocate(self, name, dtype, shape):
+        return np.zeros((self.capacity,) + shape, dtype=dtype)
+
+    def push(self, state, action, reward, next_state, done):
+        i = self.pos
+        self.obs[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_obs[i] = next_state
+        self.dones[i] = done
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        # One row per transition, e.g. a whole vector env step.
+        n = len(actions)
+        if n > self.capacity:
+            states, actions, rewards, next_states, dones = (
+                x[-self.capacity:] for x in (states, actions, rewards, next_states, dones))
+            n = self.capacity
+        rows = (self.pos + np.arange(n)) % self.capacity
+        self.obs[rows] = states
+        self.actions[rows] = actions
+        self.rewards[rows] = rewards
+        self.next_obs[rows] = next_states
+        self.dones[rows] = dones
+        self.pos = (self.pos + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def sample(self, batch_size):
+        return self.gather(self.rng.integers(self.size, size=batch_size))
+
+    def gather(self, rows):
+        # (states, actions, rewards, next_states, dones) tensors for `rows`.
+        return tuple(torch.from_numpy(field[rows])
+                     for field in (self.obs, self.actions, self.rewards, self.next_obs, self.dones))
+
+    def __len__(self):
+        return self.size
+
+
+class MemmapReplayBuffer(ReplayBuffer):
+    # ReplayBuffer whose fields are memory-mapped files under `path`, one per
+    # field plus meta.json and a two-int64 header (ring position, size).
+    # Reopening the same path picks up where the last run stopped, and any
+    # number of processes can open it at once: writes take an exclusive
+    # flock on the lock file, so appends from several actors never overlap.
+    # Files are created sparse, so capacity only costs disk as it fills.
+    VERSION = 1
+
+    def __init__(self, path, capacity, obs_shape=(OBS_SIZE,), obs_dtype=np.float32, rng=None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock_file = open(os.path.join(path, "lock"), "a")
+        meta = {"version": self.VERSION, "capacity": int(capacity), "obs_shape": [int(d) for d in obs_shape],
+                "obs_dtype": np.dtype(obs_dtype).str}
+        meta_path = os.path.join(path, "meta.json")
+        with self._locked():
+            self._mode = "r+" if os.path.exists(meta_path) else "w+"
+            if self._mode == "r+":
+                with open(meta_path) as f:
+                    existing = json.load(f)
+                if existing != meta:
+                    raise ValueError(f"Replay buffer at {path} was created with {existing}, not {meta}")
+            super().__init__(capacity, obs_shape, obs_dtype, rng)
+            self._header = np.memmap(os.path.join(path, "header.bin"), dtype=np.int64, mode=self._mode, shape=(2,))
+            if self._mode == "w+":
+                # meta.json goes last: its presence means the files are complete.
+                with open(meta_path, "w") as f:
+                    json.dump(meta, f)
+            self._load_state()
+
+    def _allocate(self, name, dtype, shape):
+        return np.memmap(os.path.join(self.path, f"{name}.bin"), dtype=dtype, mode=self._mode,
+                         shape=(self.capacity,) + shape)
+
+    @contextmanager
+    def _locked(self):
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _load_state(self):
+        self.pos, self.size = (int(x) for x in self._header)
+
+    def push(self, state, action, reward, next_state, done):
+        with self._locked():
+            self._load_state()
+            super().push(state, action, reward, next_state, done)
+            self._header[:] = self.pos, self.size
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        with self._locked():
+            self._load_state()
+            super().push_batch(states, actions, rewards, next_states, dones)
+            self._header[:] = self.pos, self.size
+
+    def sample(self, batch_size):
+        self._load_state()
+        return super().sample(batch_size)
+
+    def flush(self):
+        for name, _, _ in self.fields(self.obs.shape[1:], self.obs.dtype):
+            getattr(self, name).flush()
+        self._header.flush()
+
+    def close(self):
+        self.flush()
+        self._lock_file.close()
+
+    def __len__(self):
+        self._load_state()
+        return self.size
+
+
+class SumTree:
+    # Binary tree in one array: leaves hold priorities at [size, 2 * size) and
+    # every parent the sum of its two children, with the total at index 1.
+    # Updates and lookups take a batch of leaves and walk the levels together.
     def __init__(self, capacity):
-        self.buffer = deque(maxlen=capacity)
+        self.size = 1
+        while self.size < capacity:
+            self.size *= 2
+        self.tree = np.zeros(2 * self.size)
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def __getitem__(self, leaves):
+        return self.tree[self.size + np.asarray(leaves)]
+
+    def update(self, leaves, priorities):
+        nodes = self.size + np.asarray(leaves)
+        self.tree[nodes] = priorities
+        while nodes[0] > 1:
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values):
+        # Leaf for each prefix-sum value in [0, total).
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.size:
+            left = self.tree[2 * nodes]
+            right = values >= left
+            values -= np.where(right, left, 0)
+            nodes = 2 * nodes + right
+        return nodes - self.size
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    # Samples transition i with probability p_i^alpha / sum p^alpha, where p
+    # is the last |TD error| seen for it (new transitions get the current
+    # maximum), and returns importance-sampling weights (N * P(i))^-beta
+    # normalised by their maximum.
+    def __init__(self, capacity, obs_shape=(OBS_SIZE,), obs_dtype=np.float32, rng=None,
+                 alpha=0.6, beta=0.4, eps=1e-6):
+        super().__init__(capacity, obs_shape, obs_dtype, rng)
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = eps
+        self.tree = SumTree(capacity)
+        self.max_priority = 1.0
 
     def push(self, state, action, reward, next_state, done):
-        self.buffer.append((state, action, reward, next_state, done))
+        row = self.pos
+        super().push(state, action, reward, next_state, done)
+        self.tree.update([row], self.max_priority ** self.alpha)
+
+    def push_batch(self, states, actions, rewards, next_states, dones):
+        rows = (self.pos + np.arange(min(len(actions), self.capacity))) % self.capacity
+        super().push_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(rows, self.max_priority ** self.alpha)
+
+    def sample(self, batch_size, beta=None):
+        # Returns (batch tensors, importance weights tensor, rows); pass rows
+        # and the new TD errors to update_priorities after training on them.
+        beta = self.beta if beta is None else beta
+        total = self.tree.total
+        # One draw per equal slice of the total keeps the batch spread out.
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * (total / batch_size)
+        rows = np.minimum(self.tree.find(values), self.size - 1)
+        probs = self.tree[rows] / total
+        weights = (self.size * probs) ** -beta
+        weights /= weights.max()
+        return self.gather(rows), torch.from_numpy(weights.astype(np.float32)), rows
+
+    def update_priorities(self, rows, td_errors):
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.eps
+        self.max_priority = max(self.max_priority, priorities.max())
+        self.tree.update(rows, priorities ** self.alpha)
+
+
+class SequenceReplayBuffer:
+    # Stores every table's trajectory contiguously in a (num_tables, capacity)
+    # ring, one column per vector env step, and samples fixed windows of
+    # burn_in + seq_len steps for recurrent training.
+    #
+    # dones mark TD terminals (end of a hand); resets mark the first step of a
+    # new trajectory (new session or opponent), across which the hidden state
+    # must not carry. sample() returns (obs, actions, rewards, dones, mask)
+    # tensors shaped (batch, burn_in + seq_len, ...). mask is False for
+    # padding: steps not written yet and steps from a different trajectory
+    # than the first trained step (index burn_in). Masked steps are zeroed.
+    # The first burn_in steps only warm up the hidden state.
+    def __init__(self, capacity, num_tables, seq_len=16, burn_in=8, obs_shape=(OBS_SIZE,), obs_dtype=np.float32,
+                 rng=None):
+        self.capacity = capacity
+        self.num_tables = num_tables
+        self.seq_len = seq_len
+        self.burn_in = burn_in
+        self.rng = rng if rng is not None else np.random.default_rng()
+        shape = (num_tables, capacity)
+        self.obs = np.zeros(shape + tuple(obs_shape), dtype=obs_dtype)
+        self.actions = np.zeros(shape, dtype=np.int64)
+        self.rewards = np.zeros(shape, dtype=np.float32)
+        self.dones = np.zeros(shape, dtype=np.float32)
+        self.resets = np.zeros(shape, dtype=bool)
+        self.pos = 0
+        self.size = 0
+
+    def push(self, obs, actions, rewards, dones, resets=None):
+        # One step for every table, e.g. straight from a vector env.
+        i = self.pos
+        self.obs[:, i] = obs
+        self.actions[:, i] = actions
+        self.rewards[:, i] = rewards
+        self.dones[:, i] = dones
+        self.resets[:, i] = False if resets is None else resets
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
 
     def sample(self, batch_size):
-        return random.sample(self.buffer, batch_size)
+        if self.size <= self.burn_in:
+            raise ValueError(f"Need more than burn_in={self.burn_in} steps per table to sample, have {self.size}")
+        window = self.burn_in + self.seq_len
+        tables = self.rng.integers(self.num_tables, size=batch_size)
+        # Offsets are counted from the oldest stored step, so offset + j >= size is
+        # unwritten; every window's first trained step is written.
+        offsets = self.rng.integers(self.size - self.burn_in, size=batch_size)
+        steps = offsets[:, None] + np.arange(window)
+        cols = (self.pos - self.size + steps) % self.capacity
+        rows = tables[:, None]
+
+        resets = self.resets[rows, cols]
+        resets[:, 0] = False
+        segment = np.cumsum(resets, axis=1)
+        mask = (steps < self.size) & (segment == segment[:, self.burn_in:self.burn_in + 1])
+
+        batch = []
+        for field in (self.obs, self.actions, self.rewards, self.dones):
+            values = field[rows, cols]
+            values[~mask] = 0
+            batch.append(torch.from_numpy(values))
+        return tuple(batch) + (torch.from_numpy(mask),)
 
     def __len__(self):
-        return len(self.buffer)
+        return self.size * self.num_tables
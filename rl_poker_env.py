@@ -1,19 +1,41 @@
+import os
+
 import gym
 from gym import spaces
 import numpy as np
-import csv
-import os
-from card import Card
+from action_logger import LOG_ACTION, LOG_HAND, ActionLogger
+from betting import BettingRound, award_pots
 from deck import Deck
-from hand import Hand
+from equity import SHARED_CACHE, EquityCache
+from equity_tables import load_equity_tables
+from hand_history import new_run_id
+from observation import COMPACT_SIZE, OBS_SIZE, CompactObservationBuilder, ObservationBuilder
 from player import RLBot, RandomBot, StatisticalBot
+from seeding import spawn_rngs
+from table_state import capture_table, restore_table
+
+# Betting policies the agent picks from each street: fold, check, call, raise.
+POLICIES = [
+    {"wanted_action": "fold", "raise_amount": 0, "call_till": 0, "action_vs_raise": "fold", "reraise_amount": 0},
+    {"wanted_action": "check", "raise_amount": 0, "call_till": 0, "action_vs_raise": "fold", "reraise_amount": 0},
+    {"wanted_action": "call", "raise_amount": 10, "call_till": 100, "action_vs_raise": "call", "reraise_amount": 20},
+    {"wanted_action": "raise", "raise_amount": 30, "call_till": 30, "action_vs_raise": "reraise", "reraise_amount": 40}
+]
 
 class RLPokerEnv(gym.Env):
-    def __init__(self, initial_stack=1000, num_opponents=1, log_path="logs/poker_log.csv"):
+    def __init__(self, initial_stack=1000, num_opponents=1, log_path="logs/hand_history", equity_strength=False,
+                 log_level="hand", log_format="columnar", seed=None, compact_obs=False,
+                 run_id=None):
         super().__init__()
         self.initial_stack = initial_stack
         self.num_opponents = num_opponents
         self.log_path = log_path
+        self.log_level = log_level  # "off", "hand" or "action"
+        self.log_format = log_format  # "columnar" (log_path is a directory) or "csv"
+        # Columnar histories go to log_path/<run_id>; envs of one run share the id.
+        self.run_id = run_id if run_id is not None else new_run_id()
+        # Use the precomputed flop equity as the strength feature instead of the raw hand score.
+        self.equity_tables = load_equity_tables() if equity_strength else None
 
         self.agent = RLBot("RLAgent", stack=initial_stack)
         self.opponents = [StatisticalBot(f"StatBot{i}", stack=initial_stack) for i in range(num_opponents)]
@@ -22,36 +44,64 @@ class RLPokerEnv(gym.Env):
         self.deck = Deck()
         self.starting_bet = 10
 
-        self.observation_space = spaces.Box(low=0, high=1, shape=(107,), dtype=np.float32)
+        # compact_obs: 12-byte uint8 observations (see observation.decode_compact) instead of 107 floats.
+        self.compact_obs = compact_obs
+        if compact_obs:
+            self.observation_space = spaces.Box(low=0, high=255, shape=(COMPACT_SIZE,), dtype=np.uint8)
+        else:
+            self.observation_space = spaces.Box(low=0, high=1, shape=(OBS_SIZE,), dtype=np.float32)
         self.action_space = spaces.Box(low=0, high=1, shape=(1,), dtype=np.float32)
 
-        os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        self.obs_builder = CompactObservationBuilder() if compact_obs else ObservationBuilder()
+        self._obs_bound = False
+
         self._init_logger()
+        self.seed(seed)
         self.reset()
 
+    def seed(self, seed=None):
+        # The deck and each opponent draw from their own stream spawned from
+        # `seed`, so the same seed replays the same deals and opponent play.
+        # Whether an equity lookup hits the cache decides whether a bot samples,
+        # so a seeded env also gets a fresh cache of its own instead of the
+        # process-wide one other envs write to.
+        rngs = spawn_rngs(seed, 1 + len(self.opponents))
+        self.deck.reseed(rngs[0])
+        self.equity_cache = EquityCache() if seed is not None else None
+        for opponent, rng in zip(self.opponents, rngs[1:]):
+            opponent.rng = rng
+            opponent.equity_cache = SHARED_CACHE if self.equity_cache is None else self.equity_cache
+
     def _init_logger(self):
-        self.logfile = open(self.log_path, "w", newline="")
-        self.logger = csv.writer(self.logfile)
-        self.logger.writerow(["Episode", "Phase", "Player", "Action", "Amount", "Pot", "Stack", "Community", "Hole"])
+        path = os.path.join(self.log_path, self.run_id) if self.log_format == "columnar" else self.log_path
+        self.logger = ActionLogger(path, self.log_level, self.log_format)
         self.episode_counter = 0
 
-    def log_action(self, phase, player, action, amount):
-        try:
-            self.logger.writerow([
-                self.episode_counter,
-                phase,
-                player.name,
-                action,
-                amount,
-                self.pot,
-                player.stack,
-                ";".join(str(c) for c in self.community_cards),
-                ";".join(str(c) for c in player.hand)
-            ])
-        except Exception as e:
-            print("Logging error:", e)
-
-    def reset(self):
+    def log_action(self, phase, player, action, amount, level=LOG_ACTION):
+        if self.logger.level < level:
+            return
+        self.logger.log((self.episode_counter, phase, player.name, action, amount, self.pot, player.stack,
+                         tuple(c.index for c in self.community_cards), tuple(c.index for c in player.hand)))
+
+    def close(self):
+        self.logger.close()
+
+    def snapshot(self):
+        # Cheap immutable TableState for lookahead: restore() it to branch again.
+        # A seeded env's own equity cache stays frozen while the state is alive.
+        return capture_table(self.players, self.deck, self.community_cards, self.pot, self.current_bet,
+                             (self.episode_counter, self.done), self.equity_cache)
+
+    def restore(self, state):
+        self.community_cards = restore_table(state, self.players, self.deck)
+        self.pot = state.pot
+        self.current_bet = state.current_bet
+        self.episode_counter, self.done = state.extra
+        return self._get_obs()
+
+    def reset(self, seed=None):
+        if seed is not None:
+            self.seed(seed)
         self.episode_counter += 1
         for player in self.players:
             if player.stack <= self.initial_stack * 0.1 or player.stack > 3 * self.initial_stack:
@@ -66,6 +116,7 @@ class RLPokerEnv(gym.Env):
             p.folded = False
             p.bet = self.starting_bet if p.stack >= self.starting_bet else 0
             p.stack -= p.bet
+            p.contributed = p.bet
             self.pot += p.bet
             p.hand = []
 
@@ -91,58 +142,32 @@ class RLPokerEnv(gym.Env):
             self._betting_round(policy=action_sequence[i], phase=phase)
             if self.agent.folded:
                 self.done = True
-                return self._get_obs(), -self.pot, self.done, {}
+                obs = self._get_obs()
+                reward = -self.pot
+                # The players still in the hand run the board out for the pot.
+                self.community_cards += self.deck.deal(5 - len(self.community_cards))
+                self._determine_winner()
+                self.log_action("showdown", self.agent, "result", reward, LOG_HAND)
+                return obs, reward, self.done, {}
 
         reward = self._determine_winner()
         self.done = True
+        self.log_action("showdown", self.agent, "result", reward, LOG_HAND)
         return self._get_obs(), reward, self.done, {}
 
     def _betting_round(self, policy, phase):
-        max_iterations = 100
-        iterations = 0
-        while iterations < max_iterations:
-            iterations += 1
-            changes_made = False
-            for player in self.players:
-                if player.stack == 0 or player.folded:
-                    continue
-
-                if isinstance(player, RLBot):
-                    action = self._decide_with_policy(policy, player)
-                    if action["action"] in ["call", "raise"] and ("amount" not in action or action["amount"] <= 0):
-                        action = {"action": "fold"}
-                    if action["action"] == "raise" and action["amount"] + self.current_bet <= player.bet:
-                        action = {"action": "call", "amount": self.current_bet - player.bet}
-                    player.set_action(action)
-                    decision = player.decide_action(self.current_bet, self.pot, self.community_cards, self.deck)
-                else:
-                    decision = player.decide_action(self.current_bet, self.pot, self.community_cards, self.deck)
-
-                if decision["action"] == "fold":
-                    player.folded = True
-                    self.log_action(phase, player, "fold", 0)
-                elif decision["action"] == "call":
-                    actual_call = min(decision["amount"], player.stack, self.current_bet - player.bet)
-                    self.pot += actual_call
-                    player.stack -= actual_call
-                    player.bet += actual_call
-                    self.log_action(phase, player, "call", actual_call)
-                    changes_made = True
-                elif decision["action"] == "raise":
-                    actual_raise = min(decision["amount"], player.stack)
-                    if actual_raise > 0:
-                        self.pot += actual_raise
-                        player.stack -= actual_raise
-                        player.bet += actual_raise
-                        self.current_bet = player.bet
-                        self.log_action(phase, player, "raise", actual_raise)
-                        changes_made = True
-                elif decision["action"] == "check":
-                    self.log_action(phase, player, "check", 0)
-
-            if all(p.folded or p.bet == self.current_bet or p.stack == 0 for p in self.players):
-                if not changes_made:
-                    break
+        betting = BettingRound(self.players, self.pot)
+        while not betting.done:
+            player = betting.player
+            if player is self.agent:
+                self.current_bet = betting.current_bet
+                player.set_action(self._decide_with_policy(policy, player))
+            decision = player.decide_action(betting.current_bet, betting.pot, self.community_cards, self.deck,
+                                            betting.live - 1)
+            action, amount = betting.apply(decision)
+            self.pot = betting.pot
+            self.log_action(phase, player, action, amount)
+        self.current_bet = betting.current_bet
 
     def _decide_with_policy(self, policy, player):
         call_amt = self.current_bet - player.bet
@@ -176,41 +201,38 @@ class RLPokerEnv(gym.Env):
         if len(active) == 1:
             winner = active[0]
             winner.stack += self.pot
-            self.log_action("showdown", winner, "wins_by_fold", self.pot)
+            self.log_action("showdown", winner, "wins_by_fold", self.pot, LOG_HAND)
             self.last_winner = winner
             return self.pot if winner == self.agent else -self.pot
 
-        hands = [(p, Hand(p.hand, self.community_cards)) for p in active]
-        hands.sort(key=lambda x: x[1])
-        best_score = hands[0][1]
-        winners = [p for p, h in hands if h == best_score]
-
-        pot_share = self.pot // len(winners)
-        for winner in winners:
-            winner.stack += pot_share
+        scores = [None if p.folded else p.update_hand_state(self.community_cards).score for p in self.players]
+        winnings = award_pots(self.players, scores)
 
         for p in self.players:
-            self.log_action("showdown", p, "hand", 0)
+            self.log_action("showdown", p, "hand", 0, LOG_HAND)
 
+        winners = [p for p, won in zip(self.players, winnings) if won > 0]
         self.last_winner = winners[0] if len(winners) == 1 else None
-        return pot_share if self.agent in winners else -self.pot
-
-    def _one_hot_cards(self, cards):
-        vec = np.zeros(52)
-        for card in cards:
-            suit_idx = Card.suits.index(card.suit)
-            rank_idx = Card.ranks.index(card.rank)
-            idx = suit_idx * 13 + rank_idx
-            vec[idx] = 1
-        return vec
+        return winnings[0] if winnings[0] > 0 else -self.pot
+
+    def _hand_strength(self):
+        if self.equity_tables is not None and len(self.community_cards) == 3:
+            equity = self.equity_tables.lookup([c.index for c in self.agent.hand],
+                                               [c.index for c in self.community_cards], self.num_opponents)
+            if equity is not None:
+                return equity
+        return 1 - self.agent.update_hand_state(self.community_cards).score / 7462
+
+    def set_obs_buffer(self, out=None):
+        # Build observations straight into `out` (e.g. a row of a shared batch
+        # array) and return it from reset/step; None goes back to private copies.
+        self.obs_builder.bind(out)
+        self._obs_bound = out is not None
 
     def _get_obs(self):
-        hole_vec = self._one_hot_cards(self.agent.hand)
-        board_vec = self._one_hot_cards(self.community_cards)
-        stack = np.array([self.agent.stack / 1000], dtype=np.float32)
-        pot = np.array([self.pot / 1000], dtype=np.float32)
-        strength = np.array([1 - Hand(self.agent.hand, self.community_cards).score / 7462], dtype=np.float32)
-        return np.concatenate([hole_vec, board_vec, pot, stack, strength])
+        obs = self.obs_builder.build([c.index for c in self.agent.hand], [c.index for c in self.community_cards],
+                                     self.pot, self.agent.stack, self._hand_strength())
+        return obs if self._obs_bound else obs.copy()
 
     def render(self, mode='human'):
         print(f"Pot: {self.pot}")
@@ -4,9 +4,9 @@ import numpy as np
 import os
 import csv
 
+from betting import BettingRound
 from game import Game
 from player import RLBot, RandomBot
-from hand import Hand
 from card import Card
 
 class RLPokerEnv(gym.Env):
@@ -54,7 +54,6 @@ class RLPokerEnv(gym.Env):
         self.game.reset_for_new_round()
         self.game.deal_hole_cards()
         self.phase = 0
-        self.current_player_index = 0
         self.done = False
         self.awaiting_rl_action = False
         self.reward = 0
@@ -76,11 +75,10 @@ class RLPokerEnv(gym.Env):
         _, n_cards = self.phases[self.phase]
         self.game.deal_community_cards(n_cards)
         self.phase += 1
-        self.current_player_index = 0
-        self.acted = set()
         self.game.current_bet = 0
         for p in self.players:
             p.bet = 0
+        self.betting = BettingRound(self.players, self.game.pot)
         self._continue_phase()
 
     def _continue_phase(self):
@@ -91,48 +89,23 @@ class RLPokerEnv(gym.Env):
                 self._finalize_round()
                 return
 
-            player = self.players[self.current_player_index]
-            if player.folded or player.stack <= 0:
-                self.current_player_index = (self.current_player_index + 1) % len(self.players)
-                continue
+            if self.betting.done:
+                self.awaiting_rl_action = False
+                self._start_next_phase()
+                return
 
+            player = self.betting.player
             if isinstance(player, RLBot):
                 self.awaiting_rl_action = True
                 return
 
-            action = player.decide_action(self.game.current_bet, self.game.pot, self.game.community_cards, self.game.deck)
+            action = player.decide_action(self.betting.current_bet, self.game.pot, self.game.community_cards, self.game.deck)
             self._apply_action(player, action)
-            self.acted.add(player.name)
-
-            if len([p for p in self.players if not p.folded and p.stack > 0]) <= 1:
-                self.done = True
-                self._finalize_round()
-                return
-
-            if all(p.name in self.acted or p.folded or p.stack == 0 for p in self.players):
-                self.awaiting_rl_action = False
-                self._start_next_phase()
-                return
-
-            self.current_player_index = (self.current_player_index + 1) % len(self.players)
 
     def _apply_action(self, player, action):
-        if action["action"] == "fold":
-            player.folded = True
-        elif action["action"] == "check":
-            pass
-        elif action["action"] == "call":
-            call_amt = min(self.game.current_bet - player.bet, player.stack)
-            player.stack -= call_amt
-            player.bet += call_amt
-            self.game.pot += call_amt
-        elif action["action"] == "raise":
-            amt = min(action.get("amount", 10), player.stack)
-            player.stack -= amt
-            player.bet += amt
-            self.game.pot += amt
-            self.game.current_bet = player.bet
-            self.acted = set()
+        self.betting.apply(action)
+        self.game.pot = self.betting.pot
+        self.game.current_bet = self.betting.current_bet
 
     def step(self, action):
         if self.done:
@@ -140,7 +113,6 @@ class RLPokerEnv(gym.Env):
 
         action_dict = self._action_to_dict(action)
         self._apply_action(self.agent, action_dict)
-        self.acted.add(self.agent.name)
         self.agent_action_log.append(action_dict)
 
         remaining = [p for p in self.players if not p.folded and p.stack > 0]
@@ -148,7 +120,6 @@ class RLPokerEnv(gym.Env):
             self.done = True
             self._finalize_round()
         else:
-            self.current_player_index = (self.current_player_index + 1) % len(self.players)
             self._continue_phase()
 
         return self._get_obs(), self.reward, self.done, False, {}
@@ -169,11 +140,11 @@ class RLPokerEnv(gym.Env):
         if len(round_players) == 1:
             return self.agent in round_players
 
-        agent_hand = Hand(self.agent.hand, self.game.community_cards)
+        agent_score = self.agent.update_hand_state(self.game.community_cards).score
         for p in round_players:
             if p == self.agent:
                 continue
-            if Hand(p.hand, self.game.community_cards) > agent_hand:
+            if p.update_hand_state(self.game.community_cards).score < agent_score:
                 return False
         return True
 
@@ -5,9 +5,9 @@ import random
 import os
 import csv
 
+from betting import BettingRound
 from game import Game
 from player import RLBot, RandomBot
-from hand import Hand
 from card import Card
 
 class RLPokerEnv(gym.Env):
@@ -91,7 +91,6 @@ class RLPokerEnv(gym.Env):
         self.phase = 2
         self.game.deal_community_cards(3)
         self.game_log.append(f"FLOP: {self.game.community_cards}")
-        self.current_player_index = 0
         self.start_phase()
         if self.done:
             self._finalize_round()
@@ -100,7 +99,6 @@ class RLPokerEnv(gym.Env):
         self.phase = 3
         self.game.deal_community_cards(1)
         self.game_log.append(f"TURN: {self.game.community_cards}")
-        self.current_player_index = 0
         self.start_phase()
         if self.done:
             self._finalize_round()
@@ -109,7 +107,6 @@ class RLPokerEnv(gym.Env):
         self.phase = 4
         self.game.deal_community_cards(1)
         self.game_log.append(f"RIVER: {self.game.community_cards}")
-        self.current_player_index = 0
         self.start_phase()
         if self.done:
             self._finalize_round()
@@ -121,25 +118,19 @@ class RLPokerEnv(gym.Env):
         for p in self.players:
             p.bet = 0
         self.game.current_bet = 0
-        self.acted = set()
-        self.last_raiser = None
+        self.betting = BettingRound(self.players, self.game.pot)
         self.awaiting_rl_action = False
         self._continue_phase()
 
     def _continue_phase(self):
-        while True:
+        while not self.betting.done:
             remaining = [p for p in self.players if not p.folded and p.stack > 0]
             if len(remaining) <= 1:
                 print("Only one player remaining, ending phase.")
                 self.done = True
                 return
 
-            player = self.players[self.current_player_index]
-
-            if player.folded or player.stack <= 0:
-                print(f"{player.name} is folded or out of stack, skipping turn.")
-                self.current_player_index = (self.current_player_index + 1) % len(self.players)
-                continue
+            player = self.betting.player
 
             if isinstance(player, RLBot):
                 self.awaiting_rl_action = True
@@ -147,46 +138,26 @@ class RLPokerEnv(gym.Env):
 
             # Bot action
             action = player.decide_action(
-                self.game.current_bet,
+                self.betting.current_bet,
                 self.game.pot,
                 self.game.community_cards,
                 self.game.deck
             )
             print(f"{player.name} action: {action}")
             self.game_log.append(f"{player.name} action: {action}")
-
-            if action["action"] == "fold":
-                player.folded = True
-            elif action["action"] == "check":
-                pass
-            elif action["action"] == "call":
-                to_call = min(self.game.current_bet - player.bet, player.stack)
-                player.stack -= to_call
-                player.bet += to_call
-                self.game.pot += to_call
-            elif action["action"] == "raise":
-                raise_amt = min(action.get("amount", 10), player.stack)
-                player.stack -= raise_amt
-                player.bet += raise_amt
-                self.game.pot += raise_amt
-                self.game.current_bet = player.bet
-                self.acted = set()  # Reset for new raises
-            else:
-                raise ValueError(f"Unknown action: {action}")
-
-            self.acted.add(player.name)
+            self._apply_action(action)
 
             if len([p for p in self.players if not p.folded and p.stack > 0]) <= 1:
                 self.done = True
                 return
 
-            if all(p.name in self.acted or p.folded or p.stack == 0 for p in self.players):
-                break
-
-            self.current_player_index = (self.current_player_index + 1) % len(self.players)
-
         self.awaiting_rl_action = False
 
+    def _apply_action(self, action):
+        self.betting.apply(action)
+        self.game.pot = self.betting.pot
+        self.game.current_bet = self.betting.current_bet
+
 
     def step(self, action):
         print(f"Step called with action: {action}")
@@ -201,35 +172,16 @@ class RLPokerEnv(gym.Env):
         action_dict = self._action_to_dict(action)
         self.game_log.append(f"(RLAgent's turn) Action: {action_dict['action']}")
 
-        if action_dict["action"] == "fold":
-            self.agent.folded = True
+        self._apply_action(action_dict)
+        if self.agent.folded:
             self.done = True
             self.game.determine_winner()
-        elif action_dict["action"] == "check":
-            pass
-        elif action_dict["action"] == "call":
-            to_call = min(self.game.current_bet - self.agent.bet, self.agent.stack)
-            self.agent.stack -= to_call
-            self.agent.bet += to_call
-            self.game.pot += to_call
-        elif action_dict["action"] == "raise":
-            raise_amt = min(action_dict.get("amount", 10), self.agent.stack)
-            self.agent.stack -= raise_amt
-            self.agent.bet += raise_amt
-            self.game.pot += raise_amt
-            self.game.current_bet = self.agent.bet
-            self.acted = set()
-        else:
-            raise ValueError("Invalid RL action")
-
-        self.acted.add(self.agent.name)
 
         remaining = [p for p in self.players if not p.folded and p.stack > 0]
         if len(remaining) <= 1:
             self.done = True
             self.game.determine_winner()
         else:
-            self.current_player_index = (self.current_player_index + 1) % len(self.players)
             self._continue_phase()
 
         if self.done:
@@ -246,10 +198,9 @@ class RLPokerEnv(gym.Env):
         if len(round_players) == 1:
             return True
         
-        agent_hand = Hand(self.agent.hand, self.game.community_cards)
+        agent_score = self.agent.update_hand_state(self.game.community_cards).score
         for player in round_players[1:]:
-            player_hand = Hand(player.hand, self.game.community_cards)
-            if player_hand > agent_hand:
+            if player.update_hand_state(self.game.community_cards).score < agent_score:
                 return False
         
         return True
@@ -0,0 +1,15 @@
+import numpy as np
+
+
+def seed_sequence(seed=None):
+    # seed: None (fresh entropy), an int or an existing SeedSequence.
+    return seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+
+def spawn_seeds(seed, n):
+    # n independent child SeedSequences; picklable, so they can be sent to workers.
+    return seed_sequence(seed).spawn(n)
+
+
+def spawn_rngs(seed, n):
+    return [np.random.default_rng(s) for s in spawn_seeds(seed, n)]
@@ -0,0 +1,72 @@
+import argparse
+import math
+import multiprocessing as mp
+import os
+import time
+from functools import partial
+
+import numpy as np
+
+from game import Game
+from player import RandomBot, StatisticalBot
+from seeding import spawn_seeds
+
+BOTS = {"random": RandomBot, "stat": StatisticalBot}
+
+
+def _play(player_fns, hands, seed, starting_bet, sink_fn, worker):
+    # One worker: a quiet Game over fresh players. Returns the seat names and
+    # running sums of each seat's net chips and their squares.
+    sink = sink_fn(worker) if sink_fn is not None else None
+    game = Game(starting_bet=starting_bet, seed=seed, quiet=True, sink=sink)
+    for fn in player_fns:
+        game.add_player(fn())
+    total = np.zeros(len(player_fns))
+    total_sq = np.zeros(len(player_fns))
+    for _ in range(hands):
+        net = np.array(game.play_round(), dtype=np.float64)
+        total += net
+        total_sq += net * net
+    return [p.name for p in game.players], total, total_sq
+
+
+def simulate(player_fns, hands, workers=1, starting_bet=10, seed=None, sink_fn=None, z=1.96, context=None):
+    # player_fns: picklable zero-argument factories, one per seat, e.g.
+    # partial(RandomBot, "Rand"). sink_fn(worker) builds each worker's event
+    # sink inside that worker. The ante is the big blind for bb/100.
+    counts = [hands // workers + (i < hands % workers) for i in range(workers)]
+    jobs = [(player_fns, n, worker_seed, starting_bet, sink_fn, i)
+            for i, (n, worker_seed) in enumerate(zip(counts, spawn_seeds(seed, workers)))]
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_play(*jobs[0])]
+    else:
+        with mp.get_context(context).Pool(workers) as pool:
+            results = pool.starmap(_play, jobs)
+    elapsed = time.perf_counter() - start
+
+    names = results[0][0]
+    total = sum(r[1] for r in results)
+    total_sq = sum(r[2] for r in results)
+    mean = total / hands
+    std = np.sqrt(np.maximum(total_sq / hands - mean ** 2, 0) * hands / max(hands - 1, 1))
+    scale = 100 / starting_bet
+    bb_per_100 = {name: (mean[i] * scale, z * std[i] / math.sqrt(hands) * scale) for i, name in enumerate(names)}
+    return {"hands": hands, "seconds": elapsed, "hands_per_sec": hands / elapsed, "bb_per_100": bb_per_100}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless bot-vs-bot simulation")
+    parser.add_argument("--bots", nargs="+", choices=sorted(BOTS), default=["stat", "random"],
+                        help="one bot type per seat")
+    parser.add_argument("--hands", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--starting-bet", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    player_fns = [partial(BOTS[kind], f"{kind}{seat}") for seat, kind in enumerate(args.bots)]
+    report = simulate(player_fns, args.hands, args.workers, args.starting_bet, args.seed)
+    print(f"{report['hands']} hands in {report['seconds']:.1f}s ({report['hands_per_sec']:.0f} hands/sec)")
+    for name, (bb, ci) in report["bb_per_100"].items():
+        print(f"{name}: {bb:+.1f} ± {ci:.1f} bb/100")
@@ -0,0 +1,46 @@
+from collections import namedtuple
+
+# Immutable record of a table between actions. Per-player fields are tuples in
+# seat order. Cards stay the interned Card objects and the deck keeps its
+# shuffle arrays, which are never written in place, so a snapshot copies
+# references rather than object graphs. The equity cache the table owns, if
+# any, is frozen for as long as the snapshot lives instead of being copied.
+TableState = namedtuple("TableState", ["stacks", "bets", "contributed", "folded", "hands", "rng_states",
+                                       "deck", "board", "pot", "current_bet", "extra", "cache_freeze"])
+
+
+def _rng_state(player):
+    rng = getattr(player, "rng", None)
+    return None if rng is None else rng.bit_generator.state
+
+
+def capture_table(players, deck, board, pot, current_bet, extra=(), equity_cache=None):
+    return TableState(
+        stacks=tuple(p.stack for p in players),
+        bets=tuple(p.bet for p in players),
+        contributed=tuple(p.contributed for p in players),
+        folded=tuple(p.folded for p in players),
+        hands=tuple(tuple(p.hand) for p in players),
+        rng_states=tuple(_rng_state(p) for p in players),
+        deck=deck.snapshot(),
+        board=tuple(board),
+        pot=pot,
+        current_bet=current_bet,
+        extra=extra,
+        cache_freeze=None if equity_cache is None else equity_cache.freeze(),
+    )
+
+
+def restore_table(state, players, deck):
+    # Puts players and deck back to `state` and returns a fresh board list.
+    for i, player in enumerate(players):
+        player.stack = state.stacks[i]
+        player.bet = state.bets[i]
+        player.contributed = state.contributed[i]
+        player.folded = state.folded[i]
+        # A new list also makes update_hand_state rebuild its evaluator.
+        player.hand = list(state.hands[i])
+        if state.rng_states[i] is not None:
+            player.rng.bit_generator.state = state.rng_states[i]
+    deck.restore(state.deck)
+    return list(state.board)
@@ -0,0 +1,44 @@
+import numpy as np
+from betting import BettingRound
+from game import Game
+from player import Player, RandomBot, StatisticalBot
+from rl_poker_env import RLPokerEnv
+
+# Check, raise, re-raise, call, call: the round closes on the last call and
+# remembers the re-raiser.
+players = [Player(f"P{i}", stack=100) for i in range(3)]
+betting = BettingRound(players)
+for action in ({"action": "check"}, {"action": "raise", "amount": 10}, {"action": "raise", "amount": 20},
+               {"action": "call"}, {"action": "call"}):
+    assert not betting.done
+    betting.apply(action)
+print("Pot:", betting.pot, "last aggressor:", betting.last_aggressor)
+assert betting.done and betting.pot == 90 and betting.last_aggressor == 2
+
+# Chips are only moved between players: every hand nets to zero at a 6-seat table.
+game = Game(quiet=True, seed=7)
+for i in range(4):
+    game.add_player(RandomBot(f"Random{i}"))
+for i in range(2):
+    game.add_player(StatisticalBot(f"Stat{i}"))
+total = sum(p.stack for p in game.players)
+for _ in range(50):
+    net = game.play_round()
+    assert sum(net) == 0, net
+    assert sum(p.stack for p in game.players) == total
+print("Game chips after 50 hands:", sum(p.stack for p in game.players), "of", total)
+
+# Same for the env: after reset the blinds sit in the pot, after the hand it is all back in stacks.
+env = RLPokerEnv(num_opponents=5, log_level="off", seed=7)
+rng = np.random.default_rng(7)
+for _ in range(20):
+    env.reset()
+    total = sum(p.stack for p in env.players) + env.pot
+    policy = [{"wanted_action": rng.choice(["check", "call", "raise"]),
+               "raise_amount": int(rng.integers(10, 100)),
+               "call_till": int(rng.integers(0, 200)),
+               "action_vs_raise": rng.choice(["fold", "call", "reraise"]),
+               "reraise_amount": int(rng.integers(10, 100))} for _ in range(3)]
+    env.step(policy)
+    assert sum(p.stack for p in env.players) == total
+print("Env chips conserved over 20 hands")
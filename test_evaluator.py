@@ -0,0 +1,27 @@
+import random
+from deuces import Card as DCard, Evaluator
+from card import CARDS
+from evaluator import evaluate, rank_class, class_to_string
+
+# Our evaluator uses the deuces scale, so every 5 to 7 card hand must score the same.
+deuces_evaluator = Evaluator()
+rng = random.Random(0)
+
+
+def to_deuces(card):
+    rank = 'T' if card.rank == '10' else card.rank
+    return DCard.new(rank + card.suit[0].lower())
+
+
+hands = 0
+for size in (5, 6, 7):
+    for _ in range(20000):
+        cards = rng.sample(CARDS, size)
+        expected = deuces_evaluator.evaluate([to_deuces(c) for c in cards[2:]], [to_deuces(c) for c in cards[:2]])
+        score = evaluate(cards)
+        assert score == expected, (cards, score, expected)
+        assert class_to_string(rank_class(score)) == \
+            deuces_evaluator.class_to_string(deuces_evaluator.get_rank_class(expected))
+        hands += 1
+
+print("Hands checked against deuces:", hands)
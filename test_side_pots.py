@@ -0,0 +1,21 @@
+from betting import award_pots
+from player import Player
+
+# Multi-way all-in: seats 0-2 are all in for 50, 100 and 200, seat 3 folded
+# after putting in 200. The best hand can only win the main pot.
+players = [Player(f"P{i}", stack=0) for i in range(4)]
+for player, contributed in zip(players, [50, 100, 200, 200]):
+    player.contributed = contributed
+players[3].folded = True
+winnings = award_pots(players, [1, 2, 3, 0])
+print("Side pot winnings:", winnings)
+assert winnings == [200, 150, 200, 0]
+assert [p.stack for p in players] == winnings
+
+# A tie on the main pot splits it, the odd chip going to the earlier seat.
+players = [Player(f"P{i}", stack=0) for i in range(3)]
+for player, contributed in zip(players, [35, 35, 60]):
+    player.contributed = contributed
+winnings = award_pots(players, [5, 5, 9])
+print("Split pot winnings:", winnings)
+assert winnings == [53, 52, 25]
@@ -1,9 +1,10 @@
 import numpy as np
 import os
 import csv
-from rl_poker_env import RLPokerEnv
+from rl_poker_env import POLICIES, RLPokerEnv
 from dqn_agent import DQNAgent
-from replay_buffer import ReplayBuffer
+from replay_buffer import MemmapReplayBuffer, PrioritizedReplayBuffer, ReplayBuffer
+from seeding import spawn_seeds
 
 EPISODES = 10000
 BATCH_SIZE = 64
@@ -12,21 +13,31 @@ SAVE_EVERY = 200
 EPSILON_START = 1.0
 EPSILON_END = 0.1
 EPSILON_DECAY = 0.9995
+PRIORITIZED_REPLAY = False
+PER_BETA_START = 0.4  # annealed linearly to 1 over the run
+COMPACT_OBS = False  # store 12-byte observations in the replay buffer
+REPLAY_PATH = None  # directory for a disk-backed replay buffer that survives restarts
+SEED = None  # set an int to make a training run reproducible
 
 def policy_to_action(index):
-    return [
-        {"wanted_action": "fold", "raise_amount": 0, "call_till": 0, "action_vs_raise": "fold", "reraise_amount": 0},
-        {"wanted_action": "check", "raise_amount": 0, "call_till": 0, "action_vs_raise": "fold", "reraise_amount": 0},
-        {"wanted_action": "call", "raise_amount": 10, "call_till": 100, "action_vs_raise": "call", "reraise_amount": 20},
-        {"wanted_action": "raise", "raise_amount": 30, "call_till": 30, "action_vs_raise": "reraise", "reraise_amount": 40}
-    ][index]
-
-def train():
-    env = RLPokerEnv()
+    return POLICIES[index]
+
+def train(seed=SEED):
+    env_seed, agent_seed, buffer_seed = spawn_seeds(seed, 3)
+    env = RLPokerEnv(seed=env_seed, compact_obs=COMPACT_OBS)
     input_dim = env.observation_space.shape[0]
     output_dim = 4  # Discrete: fold, check, call, raise
-    agent = DQNAgent(input_dim, output_dim)
-    buffer = ReplayBuffer(REPLAY_CAPACITY)
+    agent = DQNAgent(input_dim, output_dim, rng=np.random.default_rng(agent_seed), compact_obs=COMPACT_OBS)
+    buffer_rng = np.random.default_rng(buffer_seed)
+    if REPLAY_PATH is not None:
+        # Priorities are not persisted, so the disk-backed buffer samples uniformly.
+        buffer = MemmapReplayBuffer(REPLAY_PATH, REPLAY_CAPACITY, env.observation_space.shape,
+                                    env.observation_space.dtype, rng=buffer_rng)
+    else:
+        buffer_cls = PrioritizedReplayBuffer if PRIORITIZED_REPLAY else ReplayBuffer
+        buffer = buffer_cls(REPLAY_CAPACITY, env.observation_space.shape, env.observation_space.dtype,
+                            rng=buffer_rng)
+    prioritized = isinstance(buffer, PrioritizedReplayBuffer)
 
     epsilon = EPSILON_START
     os.makedirs("checkpoints", exist_ok=True)
@@ -45,8 +56,14 @@ def train():
             loss = 0
 
             if len(buffer) >= BATCH_SIZE:
-                batch = buffer.sample(BATCH_SIZE)
-                loss = agent.train_step(batch)
+                if prioritized:
+                    beta = PER_BETA_START + (1 - PER_BETA_START) * ep / EPISODES
+                    batch, weights, rows = buffer.sample(BATCH_SIZE, beta)
+                    loss = agent.train_step(batch, weights)
+                    buffer.update_priorities(rows, agent.td_errors)
+                else:
+                    batch = buffer.sample(BATCH_SIZE)
+                    loss = agent.train_step(batch)
 
             writer.writerow([ep, reward, env.agent.stack, loss])
             print(f"Ep {ep}: Reward={reward:.2f}, Stack={env.agent.stack}, Loss={loss:.4f}, Epsilon={epsilon:.2f}")
@@ -54,6 +71,8 @@ def train():
             if ep % SAVE_EVERY == 0:
                 print(f"Saving model at episode {ep}")
                 agent.save(f"checkpoints/dqn_ep{ep}.pt")
+                if isinstance(buffer, MemmapReplayBuffer):
+                    buffer.flush()
 
             epsilon = max(EPSILON_END, epsilon * EPSILON_DECAY)
 
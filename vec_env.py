@@ -0,0 +1,184 @@
+import multiprocessing as mp
+import os
+from functools import partial
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from hand_history import new_run_id
+from rl_poker_env import POLICIES, RLPokerEnv
+from seeding import spawn_seeds
+
+
+def make_poker_env(index, log_dir="logs", log_format="columnar", **kwargs):
+    # Columnar hand histories get a shard per env under one run directory; CSV logs get a file per env.
+    if log_format == "columnar":
+        log_path = os.path.join(log_dir, "hand_history")
+    else:
+        log_path = os.path.join(log_dir, f"poker_log_{index}.csv")
+    return RLPokerEnv(log_path=log_path, log_format=log_format, **kwargs)
+
+
+def poker_env_fns(num_envs, seed=None, **kwargs):
+    # Each env gets its own child of `seed` (and with it its own equity cache),
+    # so runs are reproducible however the envs are spread over workers. All
+    # envs log to the same run directory.
+    kwargs.setdefault("run_id", new_run_id())
+    return [partial(make_poker_env, i, seed=env_seed, **kwargs)
+            for i, env_seed in enumerate(spawn_seeds(seed, num_envs))]
+
+
+class SharedBuffers:
+    # Observations, rewards, dones, final observations and actions for every
+    # env, laid out in one shared memory block that workers map by name.
+    def __init__(self, num_envs, obs_shape, name=None, obs_dtype=np.float32):
+        self.num_envs = num_envs
+        self.obs_shape = tuple(obs_shape)
+        obs_dtype = np.dtype(obs_dtype)
+        obs_size = num_envs * int(np.prod(self.obs_shape))
+        self._layout = [
+            ("obs", obs_dtype, (num_envs,) + self.obs_shape),
+            ("final_obs", obs_dtype, (num_envs,) + self.obs_shape),
+            ("rewards", np.float32, (num_envs,)),
+            ("actions", np.int64, (num_envs, 3)),
+            ("dones", np.bool_, (num_envs,)),
+        ]
+        nbytes = 2 * obs_size * obs_dtype.itemsize + num_envs * 4 + num_envs * 3 * 8 + num_envs
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        offset = 0
+        for field, dtype, shape in self._layout:
+            array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            setattr(self, field, array)
+            offset += array.nbytes
+
+    def close(self, unlink=False):
+        for field, _, _ in self._layout:
+            setattr(self, field, None)
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _worker(conn, env_fns, start, auto_reset):
+    # Runs envs start..start+len(env_fns)-1 and only exchanges short commands
+    # over the pipe; all per-step data goes through the shared buffers.
+    envs = [fn() for fn in env_fns]
+    space = envs[0].observation_space
+    conn.send((space.shape, space.dtype.str))
+    name, num_envs = conn.recv()
+    buffers = SharedBuffers(num_envs, space.shape, name=name, obs_dtype=space.dtype)
+    rows = range(start, start + len(envs))
+    for row, env in zip(rows, envs):
+        env.set_obs_buffer(buffers.obs[row])
+    try:
+        while True:
+            command = conn.recv()
+            if command == "step":
+                for row, env in zip(rows, envs):
+                    action_seq = [POLICIES[i] for i in buffers.actions[row].tolist()]
+                    obs, reward, done, _ = env.step(action_seq)
+                    buffers.rewards[row] = reward
+                    buffers.dones[row] = done
+                    # Observations are built in place in buffers.obs[row].
+                    if done and auto_reset:
+                        buffers.final_obs[row] = obs
+                        env.reset()
+            elif command == "reset":
+                for env in envs:
+                    env.reset()
+            elif command == "close":
+                break
+            conn.send(None)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for env in envs:
+            env.set_obs_buffer(None)
+            env.close()
+        buffers.close()
+        conn.close()
+
+
+class SharedMemoryVecEnv:
+    # Steps len(env_fns) envs in worker processes, `envs_per_worker` per process.
+    # Actions are policy indices: (num_envs,) used on every street or (num_envs, 3).
+    # With auto_reset, finished envs are reset in the worker and their last
+    # observation is kept in infos["final_observation"].
+    def __init__(self, env_fns, envs_per_worker=1, auto_reset=True, context=None):
+        self.num_envs = len(env_fns)
+        self.auto_reset = auto_reset
+        ctx = mp.get_context(context)
+        # Workers must share this process's resource tracker; one of their own
+        # would unlink the shared block as soon as the worker exits.
+        resource_tracker.ensure_running()
+        self.conns = []
+        self.processes = []
+        for start in range(0, self.num_envs, envs_per_worker):
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(target=_worker, daemon=True,
+                                  args=(child_conn, env_fns[start:start + envs_per_worker], start, auto_reset))
+            process.start()
+            child_conn.close()
+            self.conns.append(parent_conn)
+            self.processes.append(process)
+
+        obs_shape, obs_dtype = self.conns[0].recv()
+        for conn in self.conns[1:]:
+            conn.recv()
+        self.buffers = SharedBuffers(self.num_envs, obs_shape, obs_dtype=obs_dtype)
+        for conn in self.conns:
+            conn.send((self.buffers.shm.name, self.num_envs))
+        self.closed = False
+        self._waiting = False
+
+    def _broadcast(self, command):
+        for conn in self.conns:
+            conn.send(command)
+
+    def _wait(self):
+        for conn in self.conns:
+            conn.recv()
+
+    def reset(self):
+        self._broadcast("reset")
+        self._wait()
+        return self.buffers.obs.copy()
+
+    def step_async(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        self.buffers.actions[:] = actions[:, None] if actions.ndim == 1 else actions
+        self._broadcast("step")
+        self._waiting = True
+
+    def step_wait(self):
+        self._wait()
+        self._waiting = False
+        infos = {"final_observation": self.buffers.final_obs.copy()} if self.auto_reset else {}
+        return self.buffers.obs.copy(), self.buffers.rewards.copy(), self.buffers.dones.copy(), infos
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def close(self):
+        if self.closed:
+            return
+        if self._waiting:
+            self._wait()
+        self._broadcast("close")
+        for process in self.processes:
+            process.join()
+        self.buffers.close(unlink=True)
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.num_envs